@@ -1,197 +1,35 @@
-import os
-import base64
-import streamlit as st
-import google.generativeai as genai
-import PyPDF2
-
-# 1. PAGE SETUP
-st.set_page_config(page_title="Satvik Chef", page_icon="🥥")
-
-# BACKGROUND IMAGE
-def set_background(image_file):
-    image_file = os.path.abspath(image_file)
-    if os.path.exists(image_file):
-        with open(image_file, "rb") as f:
-            encoded = base64.b64encode(f.read()).decode()
-        st.markdown(
-            f"""
-            <style>
-            [data-testid="stAppViewContainer"] {{
-                background-image: url("data:image/png;base64,{encoded}");
-                background-size: cover;
-                background-position: center top;
-                background-attachment: fixed;
-                background-repeat: no-repeat;
-            }}
-            [data-testid="stAppViewContainer"]::before {{
-                content: "";
-                position: fixed;
-                top: 0; left: 0;
-                width: 100%; height: 100%;
-                background: rgba(0, 0, 0, 0.55);
-                z-index: 0;
-            }}
-            [data-testid="stAppViewContainer"] > div {{
-                position: relative;
-                z-index: 1;
-            }}
-            [data-testid="stHeader"] {{
-                background: rgba(0, 0, 0, 0) !important;
-            }}
-            [data-testid="stSidebar"] {{
-                background: rgba(15, 8, 3, 0.88) !important;
-            }}
-            </style>
-            """,
-            unsafe_allow_html=True,
-        )
+"""Every persona in culinary_heritage/personas/, each on its own route, in one process.
 
-set_background(os.path.join(os.path.dirname(os.path.abspath(__file__)), "san_mummy_bg.png"))
+    streamlit run app.py
 
-st.title("🥥 Inda Mama's Personal Chef")
+The cookbooks, caches and model clients are shared by all personas, so a
+single warm process can serve /inda-mama, /san-mummy and /dara-singh. Use
+`python serve.py` instead to start loading the cookbooks before the first
+visitor arrives.
+"""
+import functools
+import os
 
-# 2. SIDEBAR - SETUP
-with st.sidebar:
-    st.header("1. Kitchen Setup")
-    api_key = st.text_input("Google API Key", type="password")
+import streamlit as st
 
-    st.header("2. Who Is Inda Mama?")
-    st.write("Our favorite Mama, who loves us a lot") 
-    
-    st.markdown("---")
-    st.header("3. Upload Cookbooks")
-    uploaded_files = st.file_uploader(
-        "Upload any PDF's of your family recipes, handwritten notes, video's, urls, or any content you find interesting and San Mummy will spin up a recipe for you", 
-        type=["pdf"], 
-        accept_multiple_files=True
+from culinary_heritage.corpus import start_warming
+from culinary_heritage.personas import load_personas
+from culinary_heritage.ui import render
+
+personas = load_personas()
+# Once per process; a no-op if serve.py already started it
+start_warming(persona.bundled_pdfs for persona in personas.values() if persona.bundled_pdfs)
+# app.py used to be Inda Mama's page, so she stays on the root URL unless configured otherwise
+default_slug = os.environ.get("CULINARY_DEFAULT_PERSONA", "inda-mama")
+
+st.navigation([
+    st.Page(
+        functools.partial(render, persona),
+        title=persona.name,
+        icon=persona.page_icon,
+        url_path=persona.slug,
+        default=persona.slug == default_slug,
     )
-    
-    # Button to Clear Conversation
-    if st.button("Start New Conversation"):
-        st.session_state.chat_history = []
-        st.session_state.pdf_content = ""
-        st.rerun()
-
-# 3. INITIALIZE CHAT MEMORY (SESSION STATE)
-if "chat_history" not in st.session_state:
-    st.session_state.chat_history = []
-if "pdf_content" not in st.session_state:
-    st.session_state.pdf_content = ""
-
-# PRE-LOAD BUNDLED COOKBOOKS (always available to San Mummy)
-BUNDLED_PDFS = [
-    "Rasachandrika__Saraswat_Cookery_Book_with_Notes_and_Home_Remedies.pdf",
-    "the-hare-krsna-cookbook.pdf",
-]
-if "bundled_pdf_content" not in st.session_state:
-    bundled_text = ""
-    for pdf_name in BUNDLED_PDFS:
-        pdf_path = os.path.join(os.path.dirname(__file__), pdf_name)
-        if os.path.exists(pdf_path):
-            try:
-                with open(pdf_path, "rb") as f:
-                    pdf_reader = PyPDF2.PdfReader(f)
-                    for page in pdf_reader.pages:
-                        bundled_text += page.extract_text() or ""
-            except Exception:
-                pass
-    st.session_state.bundled_pdf_content = bundled_text
-
-# 4. PROCESS PDFS ONLY ONCE
-if uploaded_files and st.session_state.pdf_content == "":
-    with st.spinner("Crunching the cookbooks..."):
-        text_data = ""
-        for uploaded_file in uploaded_files:
-            try:
-                pdf_reader = PyPDF2.PdfReader(uploaded_file)
-                for page in pdf_reader.pages:
-                    text_data += page.extract_text()
-            except Exception:
-                pass
-        
-        st.session_state.pdf_content = text_data
-        st.success("✅ Cookbooks Memorized! You can now chat.")
-
-# 5. DISPLAY CHAT HISTORY
-# This loop draws the previous messages every time the app reloads
-for message in st.session_state.chat_history:
-    with st.chat_message(message["role"]):
-        st.markdown(message["content"])
-
-# 6. CHAT INPUT (The actual text box at the bottom)
-if user_input := st.chat_input("How are you feeling? (e.g., Homesick, Hungry)"):
-    
-    # A. Check for API Key
-    if not api_key:
-        st.error("Please enter your API Key in the sidebar first!")
-        st.stop()
-
-    """# B. Check for PDFs
-    if not st.session_state.pdf_content:
-        st.error("Please upload your PDF cookbooks first!")
-        st.stop()
-        
-    st.session_state.pdf_content:
-        has_pdf = False
-    if st.session_state.get("pdf_content"):
-        has_pdf = True
-    else:
-        st.info("No PDF uploaded. I'll answer using my general knowledge!")"""
-
-    # C. Display User Message
-    with st.chat_message("user"):
-        st.markdown(user_input)
-    st.session_state.chat_history.append({"role": "user", "content": user_input})
-
-    # D. Generate AI Response
-    with st.chat_message("assistant"):
-        with st.spinner("Thinking..."):
-            try:
-                genai.configure(api_key=api_key)
-                
-                # Note: I changed the model to 'gemini-1.5-flash' which is standard. 
-                # If you have access to Pro, change 'flash' to 'pro'.
-                model = genai.GenerativeModel('gemini-2.5-flash') 
-
-                # We construct the chat history for Gemini
-                # We inject the PDF content seamlessly into the context
-                conversation_context = f"""
-                <role> You are Dara Singh (You are not affeectionate and very brash, you don't swear but are rude in Punjabi), a wise, warm, and expert Satvik Grandmother Chef specializing in Punjabi cuisines of Amritsar. You are the best culinary recipe advisor ever. </role>
-<context> You have memorized these cookbooks: [Insert cookbooks here]. You will draw your authentic recipes and traditional culinary wisdom strictly from these texts. </context>
-<task> Recommend the perfect Punjabi recipe to the user by asking clarifying questions, breaking down the ingredients, and providing generated media. Ensure the conversation only ends after delivering a comprehensive recipe recommendation. </task>
-<instructions> Step 1: The Greeting & Language
-Greet the user warmly with a Punjabi slang written in English, just like the Punjabi musician Jazzy B (e.g., "Kiddan Paaji!" or "SatSri Akal!").
-Always converse in English. However, if the user speaks in Hindi or Marathi, acknowledge them by responding in Hindi, but immediately revert back to English to discuss the recipe.
-Step 2: The Probing Flow If you don't fully understand the user's exact craving or need, use a chained, step-by-step sequence to probe. Do not ask multiple questions at once. Follow this exact order:
-Action 1: Ask Question 1 to clarify their needs (e.g., what vegetables they have, time constraints). Pause and wait for the user to respond.
-Action 2: Once the user responds, ask Question 2 if needed (maximum 2 questions total). Pause and wait for the user to respond.
-Action 3: Proceed to the Final Recommendation.
-Step 3: The Final Recommendation & Media Once you have the necessary details, deliver a highly detailed recipe recommendation that includes:
-A heartwarming, grandmotherly introduction to the dish.
-A precise breakdown of all ingredients.
-Step-by-step cooking instructions.
-Media Generation: You must generate pictures of the ingredients. You must also generate video snippets for the cooking instructions, especially highlighting complex or traditional techniques like "Tempering" (Tadka) or roasting. </instructions>
-<constraints>
-Interaction: Never ask more than one question at a time, and never exceed 2 probing questions before providing the recipe
-.
-Tone: Maintain your wise, loving, Satvik Grandmother persona at all times.
-Completion: You must not end the conversation until the final recipe, ingredient breakdown, and media outputs have been successfully delivered to the user. </constraints>
-                You have memorized these cookbooks: 
-                {(st.session_state.bundled_pdf_content + st.session_state.pdf_content)[:200000]} 
-                
-                Current Conversation History:
-                {st.session_state.chat_history}
-                
-                User just said: {user_input}
-                
-                Answer the user. If you need to clarify (e.g., "Do you want spicy?"), ask them.
-                """
-                
-                response = model.generate_content(conversation_context)
-                st.markdown(response.text)
-                
-                # Save AI answer to memory
-                st.session_state.chat_history.append({"role": "assistant", "content": response.text})
-                
-            except Exception:
-                pass
+    for persona in personas.values()
+    if persona.routed
+]).run()
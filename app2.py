@@ -1,120 +1,5 @@
-import streamlit as st
-import google.generativeai as genai
-import PyPDF2
+"""The older San Mummy, with her shorter prompt and no bundled cookbooks (kept for existing deployments)."""
+from culinary_heritage.personas import load_personas
+from culinary_heritage.ui import render
 
-# 1. PAGE SETUP
-st.set_page_config(page_title="Satvik Chef", page_icon="🥥")
-st.title("🥥 My San Mummy")
-
-# 2. SIDEBAR - SETUP
-with st.sidebar:
-    st.header("1. Kitchen Setup")
-    api_key = st.text_input("Google API Key", type="password")
-
-    st.header("2. Who Is San Mummy?")
-    st.write("San Mummy was my beloved grandmother, Nirmala. This is her legacy. Her culinary skills were impeccable, and she was especially known for her seasonal specialties. Within these pages lives the knowledge that nourished the Kumta family and taught us to cherish the fine art of Indian cuisine") 
-    
-    st.markdown("---")
-    st.header("3. Upload Cookbooks")
-    uploaded_files = st.file_uploader(
-        "Upload any PDF's of your family recipes, handwritten notes, video's, urls, or any content you find interesting and San Mummy will spin up a recipe for you", 
-        type=["pdf"], 
-        accept_multiple_files=True
-    )
-    
-    # Button to Clear Conversation
-    if st.button("Start New Conversation"):
-        st.session_state.chat_history = []
-        st.session_state.pdf_content = ""
-        st.rerun()
-
-# 3. INITIALIZE CHAT MEMORY (SESSION STATE)
-if "chat_history" not in st.session_state:
-    st.session_state.chat_history = []
-if "pdf_content" not in st.session_state:
-    st.session_state.pdf_content = ""
-
-# 4. PROCESS PDFS ONLY ONCE
-if uploaded_files and st.session_state.pdf_content == "":
-    with st.spinner("Crunching the cookbooks..."):
-        text_data = ""
-        for uploaded_file in uploaded_files:
-            try:
-                pdf_reader = PyPDF2.PdfReader(uploaded_file)
-                for page in pdf_reader.pages:
-                    text_data += page.extract_text()
-            except Exception as e:
-                st.error(f"Error reading {uploaded_file.name}: {e}")
-        
-        st.session_state.pdf_content = text_data
-        st.success("✅ Cookbooks Memorized! You can now chat.")
-
-# 5. DISPLAY CHAT HISTORY
-# This loop draws the previous messages every time the app reloads
-for message in st.session_state.chat_history:
-    with st.chat_message(message["role"]):
-        st.markdown(message["content"])
-
-# 6. CHAT INPUT (The actual text box at the bottom)
-if user_input := st.chat_input("How are you feeling? (e.g., Homesick, Hungry)"):
-    
-    # A. Check for API Key
-    if not api_key:
-        st.error("Please enter your API Key in the sidebar first!")
-        st.stop()
-
-    """# B. Check for PDFs
-    if not st.session_state.pdf_content:
-        st.error("Please upload your PDF cookbooks first!")
-        st.stop()
-        
-    st.session_state.pdf_content:
-        has_pdf = False
-    if st.session_state.get("pdf_content"):
-        has_pdf = True
-    else:
-        st.info("No PDF uploaded. I'll answer using my general knowledge!")"""
-
-    # C. Display User Message
-    with st.chat_message("user"):
-        st.markdown(user_input)
-    st.session_state.chat_history.append({"role": "user", "content": user_input})
-
-    # D. Generate AI Response
-    with st.chat_message("assistant"):
-        with st.spinner("Thinking..."):
-            try:
-                genai.configure(api_key=api_key)
-                
-                # Note: I changed the model to 'gemini-1.5-flash' which is standard. 
-                # If you have access to Pro, change 'flash' to 'pro'.
-                model = genai.GenerativeModel('gemini-2.5-flash') 
-
-                # We construct the chat history for Gemini
-                # We inject the PDF content seamlessly into the context
-                conversation_context = f"""
-                You are a wise Konkani and Marathi cuisine specialist Satvik Grandmother Chef. Your name is San Mummy and people also call you Nirmala.
-                You understand Konkani, Hindi and Marathi language very well but you converse in English. You and are from the coastal regions of Maharashtra. greet everyone with a hindi language slang written in English, like a grandmom, then speak always in English. Unless someone starts speaking in hindi or Marathi, you will respond in hindi but will revert back to English and revert to the recipe,
-                As you converse you make sure you only end the conversation when you have given the user a very good recipe recommendation with the breakdown of ingredients and also generate pictures of the ingredients. 
-                Generate video snippets of the instructions, especially if they are complex, like for example: Tempering
-                If you dont understand the users query, you probe and ask questions, you should ask 1-2 question max and quickly revert to giving a response 
-                not at the same time, but in this order of sequence  -->> after the user prompt > Question 1 > User responds > Question 2> User responds > Final recommendation
-                You have memorized these cookbooks: 
-                {st.session_state.pdf_content[:200000]} 
-                
-                Current Conversation History:
-                {st.session_state.chat_history}
-                
-                User just said: {user_input}
-                
-                Answer the user. If you need to clarify (e.g., "Do you want spicy?"), ask them.
-                """
-                
-                response = model.generate_content(conversation_context)
-                st.markdown(response.text)
-                
-                # Save AI answer to memory
-                st.session_state.chat_history.append({"role": "assistant", "content": response.text})
-                
-            except Exception as e:
-                st.error(f"An error occurred: {e}")
+render(load_personas()["my-san-mummy"])
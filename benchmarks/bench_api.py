@@ -0,0 +1,169 @@
+"""Load test of the async HTTP API (culinary_heritage/api.py) against a mocked Gemini.
+
+Usage:
+    python benchmarks/bench_api.py [--sessions 1 10 100 1000] [--turns 3] [--out report.json]
+
+Starts the API with uvicorn in this process, with the mock from mock_genai.py
+in place of `google.generativeai`, then runs that many conversations at once
+from asyncio clients, each sending --turns streamed messages. Reports p50/p95
+time to the first streamed line and to the end of the answer, and throughput,
+per concurrency level as JSON.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+
+import mock_genai  # noqa: E402
+from culinary_heritage.telemetry import percentile  # noqa: E402
+
+QUESTIONS = [
+    "I'm homesick and it's raining",
+    "something with coconut and fish please",
+    "how do I temper it?",
+]
+
+
+async def request(port, method, path, body=None, on_line=None):
+    """A minimal HTTP/1.1 client: returns (status, body lines), calling `on_line` as lines arrive."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    payload = json.dumps(body).encode() if body is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: bench\r\nX-Api-Key: bench-key\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode()
+        + payload
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode().partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    lines = []
+    buffered = b""
+
+    def feed(data):
+        nonlocal buffered
+        buffered += data
+        while b"\n" in buffered:
+            line, buffered = buffered.split(b"\n", 1)
+            lines.append(line.decode())
+            if on_line:
+                on_line(line.decode())
+
+    if headers.get("transfer-encoding") == "chunked":
+        while size := int((await reader.readline()).strip(), 16):
+            feed(await reader.readexactly(size))
+            await reader.readexactly(2)
+    else:
+        feed(await reader.read())
+    if buffered:
+        feed(b"\n")
+    writer.close()
+    return status, lines
+
+
+async def converse(port, turns, samples):
+    status, lines = await request(port, "POST", "/sessions", {"persona": "san-mummy"})
+    session_id = json.loads(lines[0])["session_id"]
+    for turn in range(turns):
+        # Unique wording per session so the response cache doesn't answer for the model
+        message = f"{QUESTIONS[turn % len(QUESTIONS)]} ({session_id[:6]})"
+        started = time.perf_counter()
+        first = []
+        status, lines = await request(
+            port, "POST", f"/sessions/{session_id}/messages", {"message": message},
+            on_line=lambda line: first or first.append(time.perf_counter()),
+        )
+        done = time.perf_counter()
+        events = [json.loads(line) for line in lines if line]
+        if status != 200 or not events or not events[-1].get("done"):
+            samples["errors"].append(status)
+            continue
+        samples["first_line"].append(first[0] - started)
+        samples["answer"].append(done - started)
+
+
+async def run_level(port, n_sessions, turns):
+    samples = {"first_line": [], "answer": [], "errors": []}
+    started = time.perf_counter()
+    await asyncio.gather(*(converse(port, turns, samples) for _ in range(n_sessions)))
+    wall_s = time.perf_counter() - started
+    report = {
+        stage: {
+            "n": len(samples[stage]),
+            "p50_ms": round(percentile(samples[stage], 50) * 1000, 2) if samples[stage] else None,
+            "p95_ms": round(percentile(samples[stage], 95) * 1000, 2) if samples[stage] else None,
+        }
+        for stage in ("first_line", "answer")
+    }
+    report["errors"] = len(samples["errors"])
+    report["wall_s"] = round(wall_s, 3)
+    report["turns_per_s"] = round(n_sessions * turns / wall_s, 2)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=mock_genai.SETTINGS["latency_s"],
+                        help="mock seconds before the first token")
+    parser.add_argument("--token-rate", type=float, default=mock_genai.SETTINGS["tokens_per_s"])
+    parser.add_argument("--response-tokens", type=int, default=mock_genai.SETTINGS["response_tokens"])
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    mock_genai.install(
+        latency_s=args.latency, tokens_per_s=args.token_rate, response_tokens=args.response_tokens
+    )
+    with tempfile.TemporaryDirectory() as cache_dir:
+        os.environ["CULINARY_CACHE_DIR"] = cache_dir
+        os.environ.setdefault("CULINARY_API_MAX_SESSIONS", str(max(args.sessions) * 2))
+        import uvicorn
+
+        from culinary_heritage import api, model_pool
+
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        server = uvicorn.Server(uvicorn.Config(api.app, port=port, log_level="warning", backlog=4096))
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        while not server.started:
+            time.sleep(0.05)
+        # Let the background warm-up finish so every level sees the same corpus
+        while not json.loads(asyncio.run(request(port, "GET", "/healthz"))[1][0])["warm"]:
+            time.sleep(0.1)
+
+        report = {
+            "config": {
+                "turns_per_session": args.turns,
+                "max_concurrent_model_calls": model_pool.MAX_CONCURRENT_CALLS,
+                "mock": dict(mock_genai.SETTINGS),
+            },
+            "sessions": {str(n): asyncio.run(run_level(port, n, args.turns)) for n in args.sessions},
+        }
+        server.should_exit = True
+        thread.join()
+
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
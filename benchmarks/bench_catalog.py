@@ -0,0 +1,81 @@
+"""Dish catalog: build and load time, and shortlist latency for mood-style questions.
+
+Usage:
+    python benchmarks/bench_catalog.py [PDF ...] [--repeat 200]
+
+With no PDFs the bundled cookbooks are used. Builds the catalog from the
+cached page text, reloads it from disk, then times `Catalog.suggest` on
+recommendation requests, the work that replaces a Gemini round-trip for them.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from culinary_heritage.telemetry import percentile  # noqa: E402
+
+QUERIES = [
+    "I'm homesick and it's raining",
+    "it's so hot today, suggest something cooling",
+    "something satvik, I feel under the weather",
+    "suggest a konkani dish with coconut",
+    "hungry, but no onion or garlic please",
+    "something sweet for a festival",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("pdfs", nargs="*")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    from culinary_heritage import catalog, ingest
+    from culinary_heritage.pdf_cache import pdf_text_cache
+    from culinary_heritage.personas import load_personas
+
+    persona = load_personas()["san-mummy"]
+    pdfs = args.pdfs or [os.path.join(ROOT, name) for name in persona.bundled_pdfs]
+    pdfs = [p for p in pdfs if os.path.exists(p)]
+    if not pdfs:
+        sys.exit("No PDFs found; pass some on the command line.")
+    digests = ingest.load_cached(pdfs, pdf_text_cache)
+    sources = [(digest, os.path.basename(path)) for path, digest in zip(pdfs, digests) if digest]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        built = catalog.get_catalog(sources, cache_dir=tmp)
+        build_s = time.perf_counter() - start
+        catalog._catalogs.clear()
+        start = time.perf_counter()
+        catalog.get_catalog(sources, cache_dir=tmp)
+        load_s = time.perf_counter() - start
+        index_bytes = sum(os.path.getsize(os.path.join(tmp, name)) for name in os.listdir(tmp))
+
+    latencies = []
+    answered = 0
+    for _ in range(args.repeat):
+        for query in QUERIES:
+            start = time.perf_counter()
+            answered += bool(built.suggest(query, home_region=persona.home_region))
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    print(json.dumps({
+        "dishes": len(built),
+        "tags": len(built.postings),
+        "catalog_bytes": index_bytes,
+        "build_s": round(build_s, 3),
+        "load_s": round(load_s, 4),
+        "suggest_ms_p50": round(percentile(latencies, 50), 4),
+        "suggest_ms_p95": round(percentile(latencies, 95), 4),
+        "answered_locally": round(answered / (args.repeat * len(QUERIES)), 3),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
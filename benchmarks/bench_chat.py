@@ -0,0 +1,201 @@
+"""Offline benchmark / load test of the chat flow against a mocked Gemini.
+
+Usage:
+    python benchmarks/bench_chat.py [--sessions 1 10 100] [--latency 0.4] [--out report.json]
+
+Measures cold start (PDF extraction and indexing with an empty cache, then a
+warm reload), the per-turn stages of the chat core (dish shortlist lookup,
+response-cache lookup, prompt build, time to first token, model total, whole
+turn) with 1, 10 and 100 concurrent sessions, and a full Streamlit script
+rerun via AppTest. The opening mood question is answered from the dish
+catalog when it has a match, as in the app. Reports p50/p95 in milliseconds
+as JSON, so runs can be diffed to catch regressions.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+
+import mock_genai  # noqa: E402
+from culinary_heritage.telemetry import percentile  # noqa: E402
+
+CONVERSATION = [
+    "I'm homesick and it's raining",
+    "something with coconut and fish please",
+    "not too spicy, I have kokum at home",
+    "how do I temper it?",
+]
+
+
+def summarize(samples):
+    return {
+        stage: {
+            "n": len(values),
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "mean_ms": round(statistics.mean(values) * 1000, 2),
+        }
+        for stage, values in sorted(samples.items())
+    }
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self.samples[stage].append(seconds)
+
+
+def run_turn(session, api_key, user_input, recorder, use_cache):
+    """One chat turn through the core, as culinary_heritage.ui runs it (ChatSession.begin_turn)."""
+    started = time.perf_counter()
+    turn = session.begin_turn(user_input, api_key, bypass_cache=not use_cache)
+    for stage, seconds in turn.timings.items():
+        recorder.add(stage, seconds)
+    if turn.kind == "model":
+        for _ in turn.answer:
+            pass
+        recorder.add("model_ttft", turn.answer.first_token_s)
+        recorder.add("model_total", turn.answer.total_s)
+        turn.finish()
+    recorder.add("turn_total", time.perf_counter() - started)
+
+
+def bench_cold_start(persona):
+    from culinary_heritage import corpus
+
+    started = time.perf_counter()
+    corpus.load_bundled(persona.bundled_pdfs)
+    cold_s = time.perf_counter() - started
+
+    # Forget the in-process copies; the disk cache stays warm
+    corpus._corpora.clear()
+    corpus.pdf_text_cache._buffers.clear()
+    corpus.retrieval._indexes.clear()
+    corpus.recipe_store._known_sources.clear()
+    started = time.perf_counter()
+    corpus.load_bundled(persona.bundled_pdfs)
+    warm_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    loaded = corpus.load_bundled(persona.bundled_pdfs)
+    shared_s = time.perf_counter() - started
+    return {
+        "corpus_bytes": sum(len(index.source) for index in loaded.indexes),
+        "chunks": sum(len(index) for index in loaded.indexes),
+        "cold_extract_and_index_ms": round(cold_s * 1000, 2),
+        "warm_disk_cache_ms": round(warm_s * 1000, 2),
+        "in_process_ms": round(shared_s * 1000, 2),
+    }
+
+
+def bench_sessions(persona, n_sessions, turns, use_cache):
+    from culinary_heritage.chat import ChatSession
+    from culinary_heritage.corpus import load_bundled
+
+    recorder = Recorder()
+    bundled = load_bundled(persona.bundled_pdfs)
+
+    def converse(session_no):
+        session = ChatSession(persona, bundled)
+        for turn in range(turns):
+            # Vary the wording per session so sessions don't all share cache entries
+            user_input = f"{CONVERSATION[turn % len(CONVERSATION)]} ({session_no})"
+            run_turn(session, "bench-key", user_input, recorder, use_cache)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n_sessions) as pool:
+        list(pool.map(converse, range(n_sessions)))
+    wall_s = time.perf_counter() - started
+    report = summarize(recorder.samples)
+    report["wall_s"] = round(wall_s, 3)
+    report["turns_per_s"] = round(n_sessions * turns / wall_s, 2)
+    return report
+
+
+def bench_streamlit(persona, turns):
+    """Full script reruns of the Streamlit page, one session, via AppTest."""
+    from streamlit.testing.v1 import AppTest
+
+    script = (
+        "from culinary_heritage.personas import load_personas\n"
+        "from culinary_heritage.ui import render\n"
+        f"render(load_personas()[{persona.slug!r}])\n"
+    )
+    recorder = Recorder()
+    started = time.perf_counter()
+    app = AppTest.from_string(script, default_timeout=120).run()
+    recorder.add("first_script_run", time.perf_counter() - started)
+    app.sidebar.text_input[0].set_value("bench-key").run()
+    for turn in range(turns):
+        started = time.perf_counter()
+        app.chat_input[0].set_value(CONVERSATION[turn % len(CONVERSATION)]).run()
+        recorder.add("chat_rerun", time.perf_counter() - started)
+    return summarize(recorder.samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--persona", default="san-mummy")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--turns", type=int, default=4, help="turns per session")
+    parser.add_argument("--use-response-cache", action="store_true")
+    parser.add_argument("--latency", type=float, default=mock_genai.SETTINGS["latency_s"],
+                        help="mock seconds before the first token")
+    parser.add_argument("--token-rate", type=float, default=mock_genai.SETTINGS["tokens_per_s"],
+                        help="mock tokens per second once streaming")
+    parser.add_argument("--response-tokens", type=int, default=mock_genai.SETTINGS["response_tokens"])
+    parser.add_argument("--apptest-turns", type=int, default=4, help="0 skips the Streamlit rerun benchmark")
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    mock_genai.install(
+        latency_s=args.latency, tokens_per_s=args.token_rate, response_tokens=args.response_tokens
+    )
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # A fresh cache so the cold start really is cold; set before the package is imported
+        os.environ["CULINARY_CACHE_DIR"] = cache_dir
+        from culinary_heritage import model_pool
+        from culinary_heritage.personas import load_personas
+
+        persona = load_personas()[args.persona]
+        report = {
+            "config": {
+                "persona": persona.slug,
+                "turns_per_session": args.turns,
+                "use_response_cache": args.use_response_cache,
+                "max_concurrent_model_calls": model_pool.MAX_CONCURRENT_CALLS,
+                "mock": dict(mock_genai.SETTINGS),
+            },
+            "cold_start": bench_cold_start(persona),
+            "sessions": {
+                str(n): bench_sessions(persona, n, args.turns, args.use_response_cache)
+                for n in args.sessions
+            },
+        }
+        if args.apptest_turns:
+            report["streamlit"] = bench_streamlit(persona, args.apptest_turns)
+
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
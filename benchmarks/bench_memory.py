@@ -0,0 +1,132 @@
+"""Process memory against the number of chat sessions: per-session corpus copies vs the shared corpus.
+
+Usage:
+    python benchmarks/bench_memory.py [--sessions 1 10 100 300] [--corpus-copies 40] [--out report.json]
+
+Each measurement runs in a fresh interpreter. "per_session_copies" does what
+the app used to: every session holds its own copy of the bundled cookbook text
+(`bundled_pdf_content`) and builds each prompt from a 200k-character slice of
+it. "shared" builds ChatSessions on the shared corpus, whose text is a memory
+map of the cache file. RSS, anonymous RSS (private memory, what grows with
+sessions) and file-backed RSS (shared page cache) are reported from
+/proc/self/status, so this needs Linux.
+
+The bundled cookbooks are small, so --corpus-copies repeats their pages to
+approximate a full-size cookbook.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+MODES = ("per_session_copies", "shared")
+TRUNCATE_AT = 200000
+QUESTION = "I'm homesick, something with coconut and fish"
+
+
+def memory_kb():
+    fields = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if name in ("VmRSS", "RssAnon", "RssFile"):
+                fields[name] = int(value.split()[0])
+    return fields
+
+
+def corpus_pages(copies):
+    from culinary_heritage import ingest
+    from culinary_heritage.pdf_cache import pdf_text_cache
+    from culinary_heritage.personas import load_personas
+
+    paths = [os.path.join(ROOT, name) for name in load_personas()["san-mummy"].bundled_pdfs]
+    digests = ingest.load_cached([path for path in paths if os.path.exists(path)], pdf_text_cache)
+    pages = [page for digest in digests if digest for page in pdf_text_cache.pages(digest)]
+    return [f"{page}\n[{copy}]" for copy in range(copies) for page in pages]
+
+
+def measure(mode, n_sessions, copies):
+    """Runs in the child process: build `n_sessions` sessions, one turn each, and report memory."""
+    sys.path.insert(0, ROOT)
+    sys.path.insert(0, BENCH_DIR)
+    import mock_genai
+
+    mock_genai.install()
+    from culinary_heritage import retrieval
+    from culinary_heritage.chat import ChatSession
+    from culinary_heritage.corpus import BundledCorpus
+    from culinary_heritage.pdf_cache import content_digest, pdf_text_cache
+    from culinary_heritage.personas import load_personas
+
+    persona = load_personas()["san-mummy"]
+    pages = corpus_pages(copies)
+    baseline = memory_kb()
+    sessions = []
+    if mode == "per_session_copies":
+        for _ in range(n_sessions):
+            # What each session used to keep in st.session_state
+            state = {"bundled_pdf_content": "".join(pages), "pdf_content": "", "messages": []}
+            state["messages"].append({"role": "user", "content": QUESTION})
+            context = (state["bundled_pdf_content"] + state["pdf_content"])[:TRUNCATE_AT]
+            state["messages"].append({"role": "assistant", "content": context[:400]})
+            sessions.append(state)
+    else:
+        text = "".join(pages)
+        digest = content_digest(text.encode("utf-8"))
+        pdf_text_cache.store(digest, pages)
+        del text
+        shared = BundledCorpus((retrieval.get_index(pdf_text_cache.buffer(digest)),), (digest,))
+        for _ in range(n_sessions):
+            session = ChatSession(persona, shared)
+            session.start_turn(QUESTION)
+            prompt, _ = session.build_prompt()
+            session.finish_turn(prompt[:400], {})
+            sessions.append(session)
+    after = memory_kb()
+    return {
+        "corpus_chars": sum(len(page) for page in pages),
+        **{f"{name}_kb": value for name, value in after.items()},
+        **{f"{name}_growth_kb": after[name] - baseline[name] for name in after},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 100, 300])
+    parser.add_argument("--corpus-copies", type=int, default=40,
+                        help="repeat the bundled pages this many times")
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "SESSIONS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child[0], int(args.child[1]), args.corpus_copies)))
+        return
+
+    report = {"corpus_copies": args.corpus_copies, "modes": {}}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = dict(os.environ, CULINARY_CACHE_DIR=cache_dir)
+        for mode in MODES:
+            report["modes"][mode] = {}
+            for n_sessions in args.sessions:
+                output = subprocess.run(
+                    [sys.executable, __file__, "--corpus-copies", str(args.corpus_copies),
+                     "--child", mode, str(n_sessions)],
+                    env=env, check=True, capture_output=True, text=True,
+                ).stdout
+                report["modes"][mode][str(n_sessions)] = json.loads(output.strip().splitlines()[-1])
+
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
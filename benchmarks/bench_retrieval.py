@@ -0,0 +1,119 @@
+"""Compare prompt size and latency: 200k-character truncation vs BM25 top-k.
+
+Usage:
+    python benchmarks/bench_retrieval.py [PDF ...] [--live]
+
+With no PDFs the bundled cookbooks are used. --live also times real
+generate_content calls for both prompts (needs GOOGLE_API_KEY).
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from culinary_heritage import retrieval  # noqa: E402
+from culinary_heritage.history import estimate_tokens  # noqa: E402
+from culinary_heritage.pdf_cache import PdfTextCache  # noqa: E402
+from culinary_heritage.personas import load_personas  # noqa: E402
+from culinary_heritage.telemetry import percentile  # noqa: E402
+
+QUERIES = [
+    "I'm homesick, something with coconut and fish",
+    "sol kadhi with kokum",
+    "a simple satvik khichdi without onion or garlic",
+    "sweet for a festival with jaggery and rice flour",
+    "what can I make with raw jackfruit",
+]
+TRUNCATE_AT = 200000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("pdfs", nargs="*")
+    parser.add_argument("--live", action="store_true", help="also time real Gemini calls")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    pdfs = args.pdfs or [os.path.join(ROOT, name) for name in load_personas()["san-mummy"].bundled_pdfs]
+    pdfs = [p for p in pdfs if os.path.exists(p)]
+    if not pdfs:
+        sys.exit("No PDFs found; pass some on the command line.")
+
+    cache = PdfTextCache()
+    text = "".join(cache.get_path(p) for p in pdfs)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        index = retrieval.BM25Index.build(text.encode("utf-8"))
+        build_s = time.perf_counter() - start
+        path = os.path.join(tmp, "index.json")
+        index.save(path)
+        start = time.perf_counter()
+        retrieval.BM25Index.load(path, index.source)
+        load_s = time.perf_counter() - start
+
+    truncated = text[:TRUNCATE_AT]
+    query_ms = []
+    context_chars = []
+    context_tokens = []
+    for _ in range(args.repeat):
+        for query in QUERIES:
+            start = time.perf_counter()
+            passages = retrieval.retrieve([index], query)
+            context = retrieval.format_passages(passages)
+            query_ms.append((time.perf_counter() - start) * 1000)
+            context_chars.append(len(context))
+            context_tokens.append(estimate_tokens(context))
+
+    report = {
+        "corpus_chars": len(text),
+        "chunks": len(index),
+        "index_build_s": round(build_s, 3),
+        "index_load_s": round(load_s, 3),
+        "truncation": {
+            "context_chars": len(truncated),
+            "context_tokens_est": estimate_tokens(truncated),
+            "corpus_dropped_chars": max(0, len(text) - TRUNCATE_AT),
+        },
+        "top_k": {
+            "k": retrieval.TOP_K,
+            "context_chars_mean": round(statistics.mean(context_chars)),
+            "context_tokens_est_mean": round(statistics.mean(context_tokens)),
+            "query_ms_p50": round(percentile(query_ms, 50), 3),
+            "query_ms_p95": round(percentile(query_ms, 95), 3),
+        },
+    }
+
+    if args.live:
+        import google.generativeai as genai
+
+        genai.configure(api_key=os.environ["GOOGLE_API_KEY"])
+        model = genai.GenerativeModel("gemini-2.5-flash")
+        live = {}
+        for name, build_context in [
+            ("truncation", lambda q: truncated),
+            ("top_k", lambda q: retrieval.format_passages(retrieval.retrieve([index], q))),
+        ]:
+            latencies = []
+            for query in QUERIES:
+                prompt = f"Cookbook text:\n{build_context(query)}\n\nUser just said: {query}"
+                start = time.perf_counter()
+                model.generate_content(prompt)
+                latencies.append(time.perf_counter() - start)
+            live[name] = {
+                "e2e_s_p50": round(percentile(latencies, 50), 3),
+                "e2e_s_p95": round(percentile(latencies, 95), 3),
+            }
+        report["live"] = live
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Query latency and hit rate: BM25 vs embedding vs hybrid retrieval.
+
+Usage:
+    python benchmarks/bench_semantic.py [PDF ...] [--corpus-copies 1] [--repeat 20]
+
+With no PDFs the bundled cookbooks are used. Needs numpy and
+sentence-transformers (CULINARY_EMBEDDING_MODEL picks the model). Reports the
+time to embed the chunks and to reload the saved vectors, p50/p95 query
+latency per mode (the semantic modes include embedding the query), and how
+often a passage containing the expected dish comes back in the top k.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from culinary_heritage.telemetry import percentile  # noqa: E402
+
+# Mood-style questions and a word the right passage should contain
+QUERIES = [
+    ("I'm homesick and it's raining", "kadhi"),
+    ("something cooling after a spicy fish curry", "kokum"),
+    ("a light dinner when I'm feeling under the weather", "khichdi"),
+    ("sol kadhi with kokum", "kokum"),
+    ("a simple satvik meal without onion or garlic", "khichdi"),
+    ("something sweet for a festival", "jaggery"),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("pdfs", nargs="*")
+    parser.add_argument("--corpus-copies", type=int, default=1, help="repeat the pages to grow the corpus")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    from culinary_heritage import ingest, retrieval, semantic
+    from culinary_heritage.pdf_cache import pdf_text_cache
+    from culinary_heritage.personas import load_personas
+
+    if not semantic.available():
+        sys.exit("Needs numpy and sentence-transformers.")
+
+    pdfs = args.pdfs or [os.path.join(ROOT, name) for name in load_personas()["san-mummy"].bundled_pdfs]
+    pdfs = [p for p in pdfs if os.path.exists(p)]
+    if not pdfs:
+        sys.exit("No PDFs found; pass some on the command line.")
+    digests = ingest.load_cached(pdfs, pdf_text_cache)
+    pages = [page for digest in digests if digest for page in pdf_text_cache.pages(digest)]
+    text = "".join(f"{page}\n[{copy}]\n" for copy in range(args.corpus_copies) for page in pages)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = retrieval.get_index(text, cache_dir=tmp)
+        semantic._get_model()  # load the model outside the timings
+
+        start = time.perf_counter()
+        semantic.get_vectors(index, cache_dir=tmp)
+        embed_s = time.perf_counter() - start
+        semantic._vector_indexes.clear()
+        start = time.perf_counter()
+        semantic.get_vectors(index, cache_dir=tmp)
+        load_s = time.perf_counter() - start
+
+        modes = {
+            "keyword": lambda query: retrieval.retrieve([index], query),
+            "semantic": lambda query: semantic.retrieve([index], query, mode="semantic"),
+            "hybrid": lambda query: semantic.retrieve([index], query, mode="hybrid"),
+        }
+        results = {}
+        for mode, search in modes.items():
+            latencies = []
+            hits = 0
+            for _ in range(args.repeat):
+                for query, expected in QUERIES:
+                    start = time.perf_counter()
+                    passages = search(query)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    hits += any(expected in passage.lower() for passage in passages)
+            results[mode] = {
+                "query_ms_p50": round(percentile(latencies, 50), 3),
+                "query_ms_p95": round(percentile(latencies, 95), 3),
+                "hit_rate": round(hits / (args.repeat * len(QUERIES)), 3),
+            }
+
+    print(json.dumps({
+        "model": semantic.EMBEDDING_MODEL,
+        "chunks": len(index),
+        "k": retrieval.TOP_K,
+        "embed_chunks_s": round(embed_s, 3),
+        "load_vectors_s": round(load_s, 3),
+        "modes": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""A local stand-in for `google.generativeai`, for offline benchmarks.
+
+    import mock_genai
+    mock_genai.install(latency_s=0.4, tokens_per_s=80)   # before importing culinary_heritage
+
+Models answer after `latency_s` plus a prefill cost proportional to the prompt
+size, then stream `response_tokens` tokens at `tokens_per_s`. Nothing touches
+the network.
+"""
+import asyncio
+import sys
+import time
+import types
+
+SETTINGS = {
+    "latency_s": 0.4,           # fixed time before the first token
+    "prefill_tokens_per_s": 20000,
+    "tokens_per_s": 80.0,       # generation speed once streaming
+    "response_tokens": 400,
+    "chunk_tokens": 20,         # tokens per streamed chunk
+}
+
+_WORDS = "Arre Pora! Soak the kokum, grind the coconut, and temper with mustard seeds. ".split()
+
+
+class Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+def _chunk_text(n_tokens, offset):
+    # ~1 word per token is close enough for timing purposes
+    return " ".join(_WORDS[(offset + i) % len(_WORDS)] for i in range(n_tokens)) + " "
+
+
+def _plan(prompt):
+    """(first-token delay, [(delay, chunk text), ...]) for a prompt."""
+    prompt_tokens = len(str(prompt)) // 4
+    first_delay = SETTINGS["latency_s"] + prompt_tokens / SETTINGS["prefill_tokens_per_s"]
+    chunks = []
+    step = SETTINGS["chunk_tokens"]
+    for offset in range(0, SETTINGS["response_tokens"], step):
+        n = min(step, SETTINGS["response_tokens"] - offset)
+        chunks.append((n / SETTINGS["tokens_per_s"], _chunk_text(n, offset)))
+    return first_delay, chunks
+
+
+class GenerativeModel:
+    def __init__(self, model_name="mock", **kwargs):
+        self.model_name = model_name
+        self._client = None
+        self._async_client = None
+
+    def generate_content(self, contents, stream=False, **kwargs):
+        first_delay, chunks = _plan(contents)
+        time.sleep(first_delay)
+        if not stream:
+            time.sleep(sum(delay for delay, _ in chunks))
+            return Chunk("".join(text for _, text in chunks))
+        return self._stream(chunks)
+
+    @staticmethod
+    def _stream(chunks):
+        for i, (delay, text) in enumerate(chunks):
+            if i:
+                time.sleep(delay)
+            yield Chunk(text)
+
+    async def generate_content_async(self, contents, stream=False, **kwargs):
+        first_delay, chunks = _plan(contents)
+        await asyncio.sleep(first_delay)
+        if not stream:
+            await asyncio.sleep(sum(delay for delay, _ in chunks))
+            return Chunk("".join(text for _, text in chunks))
+        return self._astream(chunks)
+
+    @staticmethod
+    async def _astream(chunks):
+        for i, (delay, text) in enumerate(chunks):
+            if i:
+                await asyncio.sleep(delay)
+            yield Chunk(text)
+
+
+def configure(api_key=None, **kwargs):
+    pass
+
+
+def install(**settings):
+    """Register this stub as `google.generativeai` and apply `settings`."""
+    SETTINGS.update(settings)
+    module = sys.modules[__name__]
+    client = types.ModuleType("google.generativeai.client")
+    client.get_default_generative_client = lambda: None
+    client.get_default_generative_async_client = lambda: None
+    module.client = client
+    sys.modules["google.generativeai"] = module
+    sys.modules["google.generativeai.client"] = client
+    return module
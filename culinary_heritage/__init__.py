@@ -0,0 +1,9 @@
+"""Culinary Heritage: chat with the family cookbooks through a grandparent persona.
+
+The Streamlit pages (app.py), the shared ingestion, caching and retrieval core
+and the persona definitions (personas/*.toml) all live in this package.
+"""
+import os
+
+# The repository root: bundled cookbooks, the background image and static/ live here
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
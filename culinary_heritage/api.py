@@ -0,0 +1,354 @@
+"""Async HTTP API over the chat core, for front-ends that can't use the Streamlit page.
+
+    python -m culinary_heritage.api        # or: uvicorn culinary_heritage.api:app
+
+Routes:
+    GET    /personas
+    GET    /dishes?persona=...&q=...  instant shortlist from the dish catalog (see catalog.py)
+    POST   /sessions                  {"persona": "san-mummy"} -> {"session_id": ...}
+    GET    /sessions/{id}             the conversation's recent messages
+    POST   /sessions/{id}/messages    {"message": "...", "stream": true, "bypass_cache": false}
+    DELETE /sessions/{id}
+    GET    /healthz                   whether the bundled cookbooks have warmed up
+    GET    /metrics                   Prometheus text (see telemetry.py)
+
+Streamed answers are newline-delimited JSON: {"delta": "..."} lines, then
+{"done": true, "metrics": {...}}; with "stream": false the reply is one JSON
+object. The Gemini key comes from the X-Api-Key header, or GOOGLE_API_KEY.
+An optional X-User-Id header ties a conversation to a user, so other ids
+can't open it. The header is not authenticated: it only keeps apart the
+users of a single-tenant deployment behind a trusted front-end, and is no
+access control against callers who can reach the API directly. For the same
+reason there is no route listing a user's conversations; a client keeps the
+session ids it created.
+
+Every conversation runs on one event loop: model calls use the async Gemini
+client (model_pool.generate_content_async) and the short blocking steps
+(SQLite lookups, prompt building) run in the thread pool. Conversations are
+saved as they go (see conversations.py); at most CULINARY_API_MAX_SESSIONS are
+kept in memory, each dropped after CULINARY_API_SESSION_TTL seconds idle and
+resumed from the store when next used.
+"""
+import asyncio
+import contextlib
+import json
+import os
+import time
+from collections import OrderedDict
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from . import model_pool, telemetry
+from .chat import ChatSession
+from .conversations import conversation_store, new_conversation_id
+from .corpus import start_warming, warm_status
+from .personas import load_personas
+
+MAX_SESSIONS = int(os.environ.get("CULINARY_API_MAX_SESSIONS", 10000))
+SESSION_TTL_S = int(os.environ.get("CULINARY_API_SESSION_TTL", 24 * 3600))
+DEFAULT_API_KEY = os.environ.get("GOOGLE_API_KEY", "")
+
+personas = load_personas()
+
+
+class SessionStore:
+    """Conversations in memory by id, least recently used first. Only touched from the event loop."""
+
+    def __init__(self, max_sessions=MAX_SESSIONS, ttl_s=SESSION_TTL_S):
+        self.max_sessions = max_sessions
+        self.ttl_s = ttl_s
+        self._sessions = OrderedDict()  # id -> (ChatSession, asyncio.Lock, last used)
+
+    def __len__(self):
+        return len(self._sessions)
+
+    async def create(self, persona, user_id):
+        session_id = new_conversation_id()
+        await run_in_threadpool(conversation_store.create, session_id, user_id, persona.slug)
+        self._add(session_id, ChatSession(persona, conversation_id=session_id, user_id=user_id))
+        return session_id
+
+    async def get(self, session_id, user_id):
+        """Return (ChatSession, lock) for `session_id`, or None if unknown or someone else's."""
+        self._evict()
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            saved = await run_in_threadpool(conversation_store.resume, session_id)
+            if saved is None or saved.persona not in personas:
+                return None
+            # Another request may have resumed it meanwhile
+            entry = self._sessions.get(session_id) or self._add(
+                session_id, ChatSession.from_saved(personas[saved.persona], saved)
+            )
+        session, lock, _ = entry
+        if session.user_id not in (None, user_id):
+            return None
+        self._sessions[session_id] = (session, lock, time.monotonic())
+        self._sessions.move_to_end(session_id)
+        return session, lock
+
+    async def delete(self, session_id, user_id):
+        if await self.get(session_id, user_id) is None:
+            return False
+        del self._sessions[session_id]
+        await run_in_threadpool(conversation_store.delete, session_id)
+        return True
+
+    def _add(self, session_id, session):
+        entry = self._sessions[session_id] = (session, asyncio.Lock(), time.monotonic())
+        self._evict()
+        return entry
+
+    def _evict(self):
+        expired_before = time.monotonic() - self.ttl_s
+        while self._sessions:
+            session_id, (_, lock, last_used) = next(iter(self._sessions.items()))
+            if len(self._sessions) <= self.max_sessions and last_used > expired_before:
+                break
+            if lock.locked():
+                # Mid-answer; look again next time
+                self._sessions.move_to_end(session_id)
+                break
+            del self._sessions[session_id]
+
+
+sessions = SessionStore()
+
+
+def _attach_corpus(session):
+    # Sessions that start while the cookbooks are still warming pick them up on a later message
+    if session.corpus is None and session.persona.bundled_pdfs:
+        status = warm_status(session.persona.bundled_pdfs)
+        if status.ready and status.error is None:
+            session.corpus = status.corpus
+
+
+def _error_response(exc):
+    if isinstance(exc, model_pool.ModelBusyError):
+        status = 503
+    else:
+        status = model_pool.status_code(exc)
+        status = status if status in (400, 401, 403, 429) else 502
+    return JSONResponse({"error": model_pool.describe_error(exc)}, status_code=status)
+
+
+async def list_personas(request):
+    return JSONResponse([
+        {"slug": persona.slug, "name": persona.name, "title": persona.title}
+        for persona in personas.values()
+    ])
+
+
+async def suggest_dishes(request):
+    persona = personas.get(request.query_params.get("persona", next(iter(personas))))
+    if persona is None:
+        return JSONResponse({"error": "Unknown persona."}, status_code=404)
+    # No model call: only the precomputed catalog, once the cookbooks have warmed up
+    status = warm_status(persona.bundled_pdfs) if persona.bundled_pdfs else None
+    if status is None or not status.ready or status.corpus is None:
+        return JSONResponse({"dishes": [], "warm": status is None or status.ready})
+    dishes = status.corpus.catalog.suggest(request.query_params.get("q", ""), home_region=persona.home_region)
+    return JSONResponse({"dishes": dishes, "warm": True})
+
+
+def _user_id(request):
+    return request.headers.get("x-user-id") or None
+
+
+async def _json_object(request):
+    """The request body as a dict, {} if empty, or None if it isn't a JSON object."""
+    raw = await request.body()
+    if not raw.strip():
+        return {}
+    try:
+        body = json.loads(raw)
+    except ValueError:
+        return None
+    return body if isinstance(body, dict) else None
+
+
+def _bad_body():
+    return JSONResponse({"error": "The body must be a JSON object."}, status_code=400)
+
+
+async def create_session(request):
+    body = await _json_object(request)
+    if body is None:
+        return _bad_body()
+    persona = personas.get(str(body.get("persona", next(iter(personas)))))
+    if persona is None:
+        return JSONResponse({"error": "Unknown persona."}, status_code=404)
+    session_id = await sessions.create(persona, _user_id(request))
+    return JSONResponse({"session_id": session_id, "persona": persona.slug}, status_code=201)
+
+
+async def get_session(request):
+    entry = await sessions.get(request.path_params["session_id"], _user_id(request))
+    if entry is None:
+        return JSONResponse({"error": "Unknown session."}, status_code=404)
+    session, _ = entry
+    return JSONResponse({
+        "persona": session.persona.slug,
+        "messages": session.chat_history,
+        "earlier_messages": session.earlier_count,
+    })
+
+
+async def delete_session(request):
+    if not await sessions.delete(request.path_params["session_id"], _user_id(request)):
+        return JSONResponse({"error": "Unknown session."}, status_code=404)
+    return JSONResponse({"deleted": True})
+
+
+async def post_message(request):
+    entry = await sessions.get(request.path_params["session_id"], _user_id(request))
+    if entry is None:
+        return JSONResponse({"error": "Unknown session."}, status_code=404)
+    body = await _json_object(request)
+    if body is None:
+        return _bad_body()
+    user_input = str(body.get("message", "")).strip()
+    if not user_input:
+        return JSONResponse({"error": "Empty message."}, status_code=400)
+    api_key = request.headers.get("x-api-key") or DEFAULT_API_KEY
+    if not api_key:
+        return JSONResponse({"error": "No API key: send X-Api-Key."}, status_code=401)
+    stream_answer = bool(body.get("stream", True))
+    bypass_cache = bool(body.get("bypass_cache", False))
+
+    session, lock = entry
+    # One turn at a time per conversation; held until the answer has been sent
+    try:
+        await asyncio.wait_for(lock.acquire(), model_pool.SLOT_TIMEOUT_S)
+    except asyncio.TimeoutError:
+        return JSONResponse({"error": "Still answering the previous message."}, status_code=409)
+    telemetry.new_trace()
+    started = time.perf_counter()
+    try:
+        _attach_corpus(session)
+        # Catalog shortlist, remembered answer or the model, as in the app (see ChatSession.begin_turn)
+        turn = await session.begin_turn_async(user_input, api_key, stream_answer, bypass_cache)
+        if turn.kind != "model":
+            lock.release()
+            return _single_answer(turn.text, turn.metrics, stream_answer)
+    except BaseException as e:
+        lock.release()
+        if not isinstance(e, Exception):
+            # Cancelled, e.g. the client hung up
+            raise
+        telemetry.count("culinary_turn_errors_total", error=type(e).__name__)
+        return _error_response(e)
+    answer = turn.answer
+
+    async def finish():
+        metrics = await run_in_threadpool(turn.finish)
+        telemetry.observe("culinary_stage_duration_seconds", time.perf_counter() - started,
+                          telemetry.DURATION_BUCKETS, stage="api_turn")
+        return metrics
+
+    if not stream_answer:
+        try:
+            async for _ in answer:
+                pass
+            return JSONResponse({"answer": answer.text, "metrics": await finish()})
+        except Exception as e:
+            telemetry.count("culinary_turn_errors_total", error=type(e).__name__)
+            return _error_response(e)
+        finally:
+            lock.release()
+
+    return StreamingResponse(_AnswerEvents(answer, finish, lock), media_type="application/x-ndjson")
+
+
+class _AnswerEvents:
+    """NDJSON lines of a streamed answer, holding the conversation's lock until done or dropped.
+
+    Like model_pool's slot-holding streams, the lock is also released if the
+    client goes away before the body is ever iterated.
+    """
+
+    def __init__(self, answer, finish, lock):
+        self._lines = self._generate(answer, finish)
+        self._lock = lock
+        self._released = False
+
+    @staticmethod
+    async def _generate(answer, finish):
+        try:
+            async for text in answer:
+                yield json.dumps({"delta": text}) + "\n"
+            yield json.dumps({"done": True, "metrics": await finish()}) + "\n"
+        except Exception as e:
+            telemetry.count("culinary_turn_errors_total", error=type(e).__name__)
+            yield json.dumps({"error": model_pool.describe_error(e)}) + "\n"
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await anext(self._lines)
+        except BaseException:
+            self.release()
+            raise
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._lock.release()
+
+    __del__ = release
+
+
+def _single_answer(answer, metrics, stream_answer):
+    if not stream_answer:
+        return JSONResponse({"answer": answer, "metrics": metrics})
+    lines = [json.dumps({"delta": answer}) + "\n", json.dumps({"done": True, "metrics": metrics}) + "\n"]
+    return PlainTextResponse("".join(lines), media_type="application/x-ndjson")
+
+
+async def healthz(request):
+    statuses = [warm_status(persona.bundled_pdfs) for persona in personas.values() if persona.bundled_pdfs]
+    return JSONResponse({
+        "warm": all(status.ready for status in statuses),
+        "sessions": len(sessions),
+    })
+
+
+async def metrics(request):
+    return PlainTextResponse(telemetry.prometheus_text(), media_type="text/plain; version=0.0.4")
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # Same background warm-up as serve.py, so the first conversation doesn't wait for it
+    start_warming(persona.bundled_pdfs for persona in personas.values() if persona.bundled_pdfs)
+    yield
+
+
+app = Starlette(
+    routes=[
+        Route("/personas", list_personas),
+        Route("/dishes", suggest_dishes),
+        Route("/sessions", create_session, methods=["POST"]),
+        Route("/sessions/{session_id}", get_session),
+        Route("/sessions/{session_id}", delete_session, methods=["DELETE"]),
+        Route("/sessions/{session_id}/messages", post_message, methods=["POST"]),
+        Route("/healthz", healthz),
+        Route("/metrics", metrics),
+    ],
+    lifespan=lifespan,
+)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(
+        app,
+        host=os.environ.get("CULINARY_API_HOST", "127.0.0.1"),
+        port=int(os.environ.get("CULINARY_API_PORT", 8000)),
+    )
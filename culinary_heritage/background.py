@@ -0,0 +1,83 @@
+"""Background image for the chat page, prepared once per process.
+
+Streamlit reruns the whole script on every message, so re-reading and
+base64-encoding the (multi-megabyte) background each time is wasted work. The
+image is instead downscaled / re-encoded once per file version (memoized by
+mtime) and, when static serving is enabled (see .streamlit/config.toml),
+written to the app's `static/` folder under a content-hashed name so browsers download it once.
+Otherwise it falls back to a memoized data URI.
+
+CULINARY_BG_MAX_WIDTH (default 1600, 0 keeps the original size) and
+CULINARY_BG_FORMAT (webp, jpeg or png; default webp) control the payload.
+Resizing needs Pillow; without it the original file is used as-is.
+"""
+import base64
+import functools
+import hashlib
+import io
+import os
+
+import streamlit as st
+
+from . import ROOT_DIR
+
+MAX_WIDTH = int(os.environ.get("CULINARY_BG_MAX_WIDTH", 1600))
+FORMAT = os.environ.get("CULINARY_BG_FORMAT", "webp").lower()
+STATIC_DIR = os.path.join(ROOT_DIR, "static")
+
+_MIME_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg", "jpg": "image/jpeg", "png": "image/png"}
+
+
+@functools.lru_cache(maxsize=8)
+def _prepare(path, mtime_ns, max_width, image_format):
+    """Return (extension, bytes) of the image at `path`, resized and re-encoded."""
+    with open(path, "rb") as f:
+        data = f.read()
+    original_ext = os.path.splitext(path)[1].lstrip(".").lower()
+    try:
+        from PIL import Image
+    except ImportError:
+        return original_ext, data
+
+    image = Image.open(io.BytesIO(data))
+    if max_width and image.width > max_width:
+        image.thumbnail((max_width, max_width * image.height // image.width))
+    if image_format in ("jpeg", "jpg") and image.mode != "RGB":
+        image = image.convert("RGB")
+    out = io.BytesIO()
+    image.save(out, format=image_format.upper() if image_format != "jpg" else "JPEG", quality=80)
+    # Keep the original if re-encoding didn't make it any smaller
+    if out.tell() >= len(data):
+        return original_ext, data
+    return image_format, out.getvalue()
+
+
+@functools.lru_cache(maxsize=8)
+def _data_uri(path, mtime_ns, max_width, image_format):
+    ext, data = _prepare(path, mtime_ns, max_width, image_format)
+    return f"data:{_MIME_TYPES.get(ext, 'image/png')};base64,{base64.b64encode(data).decode()}"
+
+
+@functools.lru_cache(maxsize=8)
+def _static_url(path, mtime_ns, max_width, image_format):
+    ext, data = _prepare(path, mtime_ns, max_width, image_format)
+    name = f"bg-{hashlib.sha256(data).hexdigest()[:16]}.{ext}"
+    static_file = os.path.join(STATIC_DIR, name)
+    if not os.path.exists(static_file):
+        os.makedirs(STATIC_DIR, exist_ok=True)
+        tmp_file = f"{static_file}.{os.getpid()}.tmp"
+        with open(tmp_file, "wb") as f:
+            f.write(data)
+        os.replace(tmp_file, static_file)
+    return f"app/static/{name}"
+
+
+def background_url(image_file):
+    """URL for the CSS background of `image_file`, or None if it doesn't exist."""
+    image_file = os.path.abspath(image_file)
+    if not os.path.exists(image_file):
+        return None
+    mtime_ns = os.stat(image_file).st_mtime_ns
+    if st.get_option("server.enableStaticServing"):
+        return _static_url(image_file, mtime_ns, MAX_WIDTH, FORMAT)
+    return _data_uri(image_file, mtime_ns, MAX_WIDTH, FORMAT)
@@ -0,0 +1,352 @@
+"""A precomputed catalog of dishes, for instant mood, region and diet recommendations.
+
+"I'm homesick and it's raining" used to cost a full Gemini round-trip over
+the cookbooks. Instead, the recipes recipe_db finds in the bundled cookbooks
+are collected once into a catalog of dishes, each tagged by region, diet
+(satvik, no onion/garlic, vegetarian), main ingredient, season and mood, with
+an inverted index from tag to dishes. A recommendation request is matched
+against the tags locally and answered with a ranked shortlist; Gemini is only
+asked to elaborate once a dish is picked.
+
+Catalogs are saved in the cache directory, keyed by the cookbooks' content
+hashes, and built along with the bundled corpus (see corpus.py). Run
+`python -m culinary_heritage.catalog` to build them ahead of time.
+"""
+import array
+import json
+import os
+import re
+import threading
+from collections import Counter
+
+from .pdf_cache import CACHE_DIR, pdf_text_cache, text_version
+from .recipe_db import BUNDLED_SOURCE_TAGS, extract_recipes, tag_recipe
+from .response_cache import corpus_fingerprint
+from .retrieval import tokenize
+
+# Bump this when the tagging changes; catalogs are then rebuilt
+CATALOG_VERSION = 2
+SHORTLIST_SIZE = 5
+
+
+def _vocabulary(groups):
+    """{tag: "word word ..."} -> {word: tag}"""
+    return {word: tag for tag, words in groups.items() for word in words.split()}
+
+
+MAIN_INGREDIENTS = _vocabulary({
+    "coconut": "coconut coconuts",
+    "rice": "rice poha",
+    "lentils": "dal moong toor tur urad chana masoor lentil lentils",
+    "fish": "fish pomfret bangda mackerel surmai sardine sardines bombil",
+    "prawns": "prawn prawns shrimp shrimps kolambi",
+    "crab": "crab crabs",
+    "chicken": "chicken",
+    "mutton": "mutton",
+    "egg": "egg eggs",
+    "paneer": "paneer",
+    "potato": "potato potatoes batata aloo",
+    "jackfruit": "jackfruit phanas",
+    "brinjal": "brinjal brinjals eggplant vangi baingan",
+    "greens": "spinach palak methi sarson amaranth",
+    "kokum": "kokum",
+    "curd": "curd yogurt dahi buttermilk",
+    "wheat": "wheat atta flour chapati roti",
+})
+REGION_WORDS = _vocabulary({
+    "konkani": "kokum tirphal teppal sol bangda kolambi",
+    "punjabi": "makki sarson lassi chole rajma amritsari",
+    "south-indian": "sambar rasam dosa idli",
+    "gujarati": "dhokla thepla undhiyu",
+})
+SEASON_WORDS = _vocabulary({
+    "summer": "kokum buttermilk cucumber mango mint sol",
+    "monsoon": "ginger pakoda pakodas bhaji bhajji fritters soup",
+    "winter": "sesame til jaggery gur bajra makki sarson methi",
+})
+MOOD_WORDS = _vocabulary({
+    "comforting": "khichdi dal ghee kadhi soup rasam varan",
+    "light": "moong khichdi soup rasam kanji steamed",
+    "cooling": "kokum curd buttermilk cucumber mint sol",
+    "festive": "kheer modak ladoo laddoo halwa cardamom saffron puran",
+    "spicy": "chilli chillies chili chilies pepper masala tirphal teppal",
+})
+
+# What people say when they want a suggestion, and the tags that suit it
+QUERY_TAGS = {
+    # Plus the persona's home region, see Catalog.wanted_tags
+    "homesick": ("mood:comforting",),
+    "sad": ("mood:comforting",),
+    "lonely": ("mood:comforting",),
+    "tired": ("mood:comforting", "mood:light"),
+    "stressed": ("mood:comforting",),
+    "cold": ("mood:comforting", "season:winter"),
+    "rain": ("season:monsoon", "mood:comforting"),
+    "raining": ("season:monsoon", "mood:comforting"),
+    "rainy": ("season:monsoon", "mood:comforting"),
+    "monsoon": ("season:monsoon",),
+    "hot": ("mood:cooling", "season:summer"),
+    "heat": ("mood:cooling", "season:summer"),
+    "summer": ("season:summer", "mood:cooling"),
+    "winter": ("season:winter",),
+    "sick": ("mood:light",),
+    "unwell": ("mood:light",),
+    "fever": ("mood:light",),
+    "weather": ("mood:light",),
+    "light": ("mood:light",),
+    "happy": ("mood:festive",),
+    "celebrate": ("mood:festive",),
+    "celebrating": ("mood:festive",),
+    "festival": ("mood:festive",),
+    "festive": ("mood:festive",),
+    "guests": ("mood:festive",),
+    "party": ("mood:festive",),
+    "sweet": ("diet:sweet", "mood:festive"),
+    "spicy": ("mood:spicy",),
+}
+# Diets a question can ask for; dishes without the tag are left out
+DIET_WORDS = {
+    "satvik": "diet:satvik",
+    "sattvic": "diet:satvik",
+    "satvic": "diet:satvik",
+    "veg": "diet:vegetarian",
+    "vegetarian": "diet:vegetarian",
+}
+# A dish found in several cookbooks keeps these only if every version keeps to them
+RESTRICTIVE_DIETS = frozenset({*DIET_WORDS.values(), "diet:no-onion-garlic"})
+# How the user is or what the day is like: enough, in a first message, to take as
+# asking for a dish. Adjectives like hot, light or sweet can be about anything
+# ("is it ok to use hot water?") and need a request word as well
+STATE_WORDS = frozenset(
+    "homesick sad lonely tired stressed sick unwell fever rain raining rainy monsoon "
+    "celebrate celebrating festival".split()
+)
+# Words and phrases that ask for a suggestion outright, whatever else the message says
+REQUEST_WORDS = frozenset(
+    "suggest suggestion suggestions recommend recommendation recommendations ideas idea craving crave "
+    "hungry".split()
+)
+REQUEST_PHRASES = (
+    "what should i cook", "what should i make", "what can i cook", "what can i make",
+    "what to cook", "what to make", "in the mood for",
+)
+
+_WORD_RE = re.compile(r"[a-z]+")
+_NO_ONION_GARLIC_RE = re.compile(r"\b(no|without|avoid)\s+(onions?|garlic)\b", re.IGNORECASE)
+# Recipe numbers around a title: "12. Sol Kadhi", "Sol Kadhi 2"
+_TITLE_NUMBER_RE = re.compile(r"^\d+[.)]?\s+|\s+\d+$")
+
+
+def tag_dish(recipe, source_tags=()):
+    """Catalog tags for one recipe from recipe_db.extract_recipes, as "kind:value" strings."""
+    name_words = tokenize(" ".join([recipe["title"], *recipe["ingredients"]]))
+    tags = {f"diet:{tag}" for tag in tag_recipe(recipe)}
+    tags.update(f"region:{tag}" for tag in source_tags)
+    for words, kind in ((REGION_WORDS, "region"), (SEASON_WORDS, "season"), (MOOD_WORDS, "mood")):
+        tags.update(f"{kind}:{words[word]}" for word in name_words if word in words)
+    tags.update(f"ingredient:{MAIN_INGREDIENTS[word]}" for word in name_words if word in MAIN_INGREDIENTS)
+    if "diet:sweet" in tags:
+        tags.add("mood:festive")
+    return tags
+
+
+def _main_ingredient(recipe):
+    # The first ingredient line naming something in the vocabulary
+    for line in recipe["ingredients"]:
+        for word in tokenize(line):
+            if word in MAIN_INGREDIENTS:
+                return MAIN_INGREDIENTS[word]
+    return None
+
+
+class Catalog:
+    """Dishes and an inverted index from tag to dish ids.
+
+    `dishes` are dicts with title, main (ingredient), tags and sources
+    ([name, page] pairs, one per cookbook page the dish was found on). A
+    dish's diet tags hold for every one of its sources, so any of them can
+    be cited for a diet request.
+    """
+
+    def __init__(self, dishes, postings):
+        self.dishes = dishes
+        self.postings = {tag: array.array("I", ids) for tag, ids in postings.items()}
+        self._title_words = [frozenset(tokenize(dish["title"])) for dish in dishes]
+
+    def __len__(self):
+        return len(self.dishes)
+
+    @classmethod
+    def build(cls, sources):
+        """Catalog the recipes of `sources`, (name, pages, source tags) triples."""
+        dishes = []
+        by_title = {}
+        for name, pages, source_tags in sources:
+            for recipe in extract_recipes(pages):
+                # "12. SOL KADHI" and "SOL KADHI" are the same dish
+                key = " ".join(word for word in tokenize(recipe["title"]) if not word.isdigit())
+                if not key:
+                    continue
+                tags = tag_dish(recipe, source_tags)
+                dish = by_title.get(key)
+                if dish is None:
+                    dish = by_title[key] = {
+                        "title": _TITLE_NUMBER_RE.sub("", recipe["title"]),
+                        "main": _main_ingredient(recipe),
+                        "tags": tags,
+                        "sources": [],
+                    }
+                    dishes.append(dish)
+                else:
+                    # One version with onion and garlic makes the dish not no-onion-garlic
+                    dish["tags"] = (dish["tags"] | (tags - RESTRICTIVE_DIETS)) - (RESTRICTIVE_DIETS - tags)
+                dish["sources"].append([name, recipe["page"]])
+        postings = {}
+        for dish_id, dish in enumerate(dishes):
+            dish["tags"] = sorted(dish["tags"])
+            for tag in dish["tags"]:
+                postings.setdefault(tag, []).append(dish_id)
+        return cls(dishes, postings)
+
+    def wanted_tags(self, query, require_request=False, home_region=None):
+        """Return (weights, required) for a question: tags it asks for, and diets it insists on.
+
+        Both are empty unless the question asks for a suggestion without
+        naming a dish in the catalog: with a request word or phrase
+        ("suggest", "what should I cook"), or, unless `require_request`, with a
+        STATE_WORDS word alone ("I'm homesick and it's raining"). Homesick
+        questions also ask for `home_region`, the persona's own cuisine.
+        """
+        words = set(tokenize(query))
+        if not (is_request(query) or not require_request and words & STATE_WORDS):
+            return {}, set()
+        if any(title_words and title_words <= words for title_words in self._title_words):
+            return {}, set()
+        weights = Counter()
+        for word in words:
+            for tag in QUERY_TAGS.get(word, ()):
+                weights[tag] += 1.0
+            if word == "homesick" and home_region:
+                weights[f"region:{home_region}"] += 1.0
+            if word in MAIN_INGREDIENTS:
+                weights[f"ingredient:{MAIN_INGREDIENTS[word]}"] += 2.0
+            if f"region:{word}" in self.postings:
+                weights[f"region:{word}"] += 2.0
+        required = {DIET_WORDS[word] for word in words if word in DIET_WORDS}
+        if _NO_ONION_GARLIC_RE.search(query):
+            required.add("diet:no-onion-garlic")
+        return weights, required
+
+    def suggest(self, query, k=SHORTLIST_SIZE, require_request=False, home_region=None):
+        """A ranked shortlist of dishes for a recommendation request, or [] if it isn't one.
+
+        Each result is the dish dict plus `matched`, the wanted tags it has.
+        See `wanted_tags` for `require_request` and `home_region`.
+        """
+        weights, required = self.wanted_tags(query, require_request, home_region)
+        if not weights and not required:
+            return []
+        allowed = None
+        for tag in required:
+            ids = set(self.postings.get(tag, ()))
+            allowed = ids if allowed is None else allowed & ids
+        scores = Counter()
+        for tag, weight in weights.items():
+            for dish_id in self.postings.get(tag, ()):
+                if allowed is None or dish_id in allowed:
+                    scores[dish_id] += weight
+        if not scores and allowed:
+            # Only a diet was asked for: every dish that fits will do
+            scores.update(dict.fromkeys(allowed, 0.0))
+        # Ties go to dishes found in more places, then alphabetically
+        ranked = sorted(
+            scores, key=lambda i: (-scores[i], -len(self.dishes[i]["sources"]), self.dishes[i]["title"])
+        )
+        return [
+            {**self.dishes[i], "matched": [tag for tag in self.dishes[i]["tags"] if tag in weights]}
+            for i in ranked[:k]
+        ]
+
+    def save(self, path):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": CATALOG_VERSION,
+                "dishes": self.dishes,
+                "postings": {tag: ids.tolist() for tag, ids in self.postings.items()},
+            }, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != CATALOG_VERSION:
+            return None
+        return cls(data["dishes"], data["postings"])
+
+
+def is_request(query):
+    """Whether `query` asks for a suggestion outright (see REQUEST_WORDS and REQUEST_PHRASES)."""
+    words = _WORD_RE.findall(query.lower())
+    text = f" {' '.join(words)} "
+    return not REQUEST_WORDS.isdisjoint(words) or any(f" {phrase} " in text for phrase in REQUEST_PHRASES)
+
+
+def is_shortlist(reply, persona):
+    """Whether an assistant reply is a shortlist from `format_shortlist` for `persona`."""
+    return reply.startswith(persona.shortlist_intro)
+
+
+def format_shortlist(dishes, persona):
+    """The chat reply for a shortlist from `Catalog.suggest`, in `persona`'s words."""
+    lines = [persona.shortlist_intro, ""]
+    for n, dish in enumerate(dishes, 1):
+        why = ", ".join(tag.split(":", 1)[1] for tag in dish["matched"])
+        name, page = dish["sources"][0]
+        source = os.path.splitext(name)[0].replace("_", " ")
+        lines.append(f"{n}. **{dish['title']}**" + (f" ({why})" if why else "") + f" · {source}, page {page}")
+    lines += ["", persona.shortlist_outro]
+    return "\n".join(lines)
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(sources, cache_dir=CACHE_DIR):
+    """Return the catalog of `sources`, (digest, name) pairs of cookbooks in the text cache.
+
+    Loaded from `cache_dir` when it has been built before, otherwise built
+    from the cached page texts and saved.
+    """
+    sources = list(sources)
+    key = corpus_fingerprint(digest for digest, _ in sources)
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is not None:
+            return catalog
+        path = os.path.join(cache_dir, f"{key}.catalog.v{CATALOG_VERSION}.{text_version()}.json")
+        if os.path.exists(path):
+            try:
+                catalog = Catalog.load(path)
+            except (OSError, ValueError):
+                catalog = None
+        if catalog is None:
+            catalog = Catalog.build(
+                (name, pdf_text_cache.pages(digest), BUNDLED_SOURCE_TAGS.get(name, ())) for digest, name in sources
+            )
+            os.makedirs(cache_dir, exist_ok=True)
+            catalog.save(path)
+        _catalogs[key] = catalog
+        return catalog
+
+
+if __name__ == "__main__":
+    from .corpus import load_bundled
+    from .personas import load_personas
+
+    for persona in load_personas().values():
+        if persona.bundled_pdfs:
+            corpus = load_bundled(persona.bundled_pdfs)
+            print(f"{persona.slug}: {len(corpus.catalog)} dishes")
@@ -0,0 +1,323 @@
+"""The chat core shared by every persona, independent of Streamlit.
+
+A ChatSession is one conversation with one persona: its messages, the
+history summary, the index of the user's own uploaded cookbooks and per-turn
+metrics. The bundled corpus is shared, never copied. The UI, the HTTP API
+and the benchmarks all run a turn the same way:
+
+    turn = session.begin_turn(user_input, api_key)     # or await begin_turn_async
+    if turn.kind == "model":
+        for text in turn.answer: ...                   # show it as it streams
+        turn.finish()
+
+which goes start_turn -> dish shortlist (see catalog.py) -> response cache ->
+build_prompt -> model stream -> finish_turn, stopping at the first step that
+has an answer.
+
+A session with a `conversation_id` saves each finished turn to the
+conversation store, and `ChatSession.from_saved` picks it up again after a
+reload or restart.
+"""
+import asyncio
+import time
+
+from . import ingest, model_pool, retrieval, semantic, streaming, telemetry
+from .catalog import format_shortlist, is_shortlist
+from .conversations import RESUME_MESSAGES, conversation_store, new_conversation_id
+from .history import HistoryManager, section_tokens
+from .pdf_cache import pdf_text_cache
+from .recipe_db import format_recipes, recipe_store
+from .response_cache import answer_cache, corpus_fingerprint, make_key
+
+PROMPT_TEMPLATE = """
+{persona}
+Relevant passages from the cookbooks you have memorized:
+{cookbook}
+
+Current Conversation History:
+{history}
+
+User just said: {user_input}
+
+Answer the user. If you need to clarify (e.g., "Do you want spicy?"), ask them.
+"""
+
+
+class Turn:
+    """The answer to one user message, from `ChatSession.begin_turn` or `begin_turn_async`.
+
+    `kind` is "shortlist" (from the dish catalog, `dishes` set), "cached" (from
+    the response cache) or "model". The first two are already recorded, with
+    `text` and `metrics` final. A model turn holds the started `answer` stream:
+    iterate it (`async for` for the async variant), then call `finish()` to
+    record the answer and cache it. If the stream fails, including with
+    model_pool.EmptyAnswerError, don't call `finish()`. `timings` has the
+    seconds spent in each step before the model call, `sections` the parts
+    of the prompt (see ChatSession.build_prompt).
+    """
+
+    def __init__(self, session, kind, text=None, metrics=None, dishes=(), cache_key=None,
+                 bypass_cache=False, timings=None):
+        self.session = session
+        self.kind = kind
+        self._text = text
+        self.metrics = metrics
+        self.dishes = dishes
+        self.timings = timings or {}
+        # Filled in by begin_turn for a model turn: the prompt's parts and the started stream
+        self.sections = None
+        self.answer = None
+        self._cache_key = cache_key
+        self._bypass_cache = bypass_cache
+
+    @property
+    def text(self):
+        return self.answer.text if self.answer is not None else self._text
+
+    def finish(self):
+        """Record a model turn's streamed answer; returns its metrics."""
+        self.metrics = self.answer.metrics()
+        self.metrics["prompt_tokens"] = section_tokens(self.sections)
+        self.session.finish_turn(self.answer.text, self.metrics)
+        if not self._bypass_cache:
+            answer_cache.put(self._cache_key, self.answer.text)
+        return self.metrics
+
+
+class ChatSession:
+    def __init__(self, persona, corpus=None, conversation_id=None, user_id=None):
+        self.persona = persona
+        self.corpus = corpus
+        self.user_id = user_id
+        self.conversation_id = None
+        self.reset()
+        self.conversation_id = conversation_id
+
+    @classmethod
+    def from_saved(cls, persona, saved, corpus=None):
+        """Resume a conversation read back by `conversation_store.resume`.
+
+        Only its recent messages are loaded; the older ones reach the prompt as
+        history summary lines and can be paged in for display with `load_earlier`.
+        """
+        session = cls(persona, corpus, saved.id, saved.user_id or None)
+        session.chat_history = saved.messages
+        session.history.summary_lines = saved.summary_lines
+        session.first_seq = saved.first_seq
+        session.earlier_count = saved.earlier_count
+        return session
+
+    def reset(self):
+        """Forget the conversation and the uploaded cookbooks.
+
+        A saved conversation is left in the store and a new one started.
+        """
+        self.chat_history = []
+        self.history = HistoryManager()
+        self.turn_metrics = []
+        # Uploaded cookbooks: content digest -> (file name, index)
+        self.uploads = {}
+        # Older saved messages, only paged in for display (see load_earlier)
+        self.earlier_messages = []
+        self.first_seq = 0
+        self.earlier_count = 0
+        if self.conversation_id is not None:
+            self.conversation_id = new_conversation_id()
+
+    def load_earlier(self, limit=RESUME_MESSAGES):
+        """Page in up to `limit` more of the saved messages before the ones loaded."""
+        messages = conversation_store.earlier(self.conversation_id, self.first_seq, limit)
+        self.earlier_messages[:0] = messages
+        self.first_seq -= len(messages)
+        self.earlier_count = max(0, self.earlier_count - len(messages)) if len(messages) == limit else 0
+        return messages
+
+    @property
+    def indexes(self):
+        return [*(self.corpus.indexes if self.corpus else ()), *(index for _, index in self.uploads.values())]
+
+    @property
+    def source_digests(self):
+        return [*(self.corpus.digests if self.corpus else ()), *self.uploads]
+
+    def sync_uploads(self, documents, on_progress=None):
+        """Make the uploaded cookbooks match `documents`, (digest, name, bytes) triples.
+
+        The bytes are only read for digests not already uploaded, so callers
+        may pass None for those.
+
+        Files no longer listed are dropped, and only files this process has
+        never extracted are parsed; the rest come from the shared text cache
+        and index cache, whichever session uploaded them first. Returns the
+        ExtractedDocuments of the files that had to be extracted. What could
+        be read of a file that failed is searchable in this session only.
+        """
+        current = {}
+        for digest, name, data in documents:
+            current.setdefault(digest, (name, data))
+        for digest in set(self.uploads) - set(current):
+            del self.uploads[digest]
+        added = [(digest, name, data) for digest, (name, data) in current.items() if digest not in self.uploads]
+        missing = [(digest, name, data) for digest, name, data in added if pdf_text_cache.buffer(digest) is None]
+
+        results = []
+        if missing:
+            results = ingest.extract_documents([(name, data) for _, name, data in missing], on_progress)
+            for (digest, name, _), result in zip(missing, results):
+                if result.error is None:
+                    pdf_text_cache.store(digest, result.pages)
+                else:
+                    # Not cached, so a fresh upload of the same file tries again
+                    self.uploads[digest] = (name, retrieval.get_index("".join(result.pages)))
+        for digest, name, _ in added:
+            if digest not in self.uploads:
+                recipe_store.add_source(digest, name, pdf_text_cache.pages(digest), ("family",))
+                self.uploads[digest] = (name, retrieval.get_index(pdf_text_cache.buffer(digest)))
+        if semantic.enabled():
+            for digest, _, _ in added:
+                semantic.get_vectors(self.uploads[digest][1])
+        return results
+
+    def suggest_dishes(self, user_input):
+        """A shortlist from the bundled cookbooks' dish catalog if `user_input` asks for a suggestion, else [].
+
+        Answered locally (see catalog.py); the user's pick then goes to the
+        model as an ordinary turn. A mood word alone ("homesick", "raining")
+        only counts as a request in the first message; later ones have to ask
+        ("suggest...", "what should I cook"). Once the model has answered, the
+        conversation is about its recipe and follow-ups like "make it light"
+        go to it.
+        """
+        if self.corpus is None or self.corpus.catalog is None:
+            return []
+        earlier = self.chat_history[:-1]
+        if self.first_seq or any(
+            message["role"] == "assistant" and not is_shortlist(message["content"], self.persona) for message in earlier
+        ):
+            return []
+        with telemetry.span("shortlist", persona=self.persona.slug) as fields:
+            dishes = self.corpus.catalog.suggest(
+                user_input, require_request=bool(earlier), home_region=self.persona.home_region
+            )
+            fields["dishes"] = len(dishes)
+        return dishes
+
+    def start_turn(self, user_input):
+        """Record the user's message and return the response-cache key for it."""
+        cache_key = make_key(
+            self.persona.prompt,
+            corpus_fingerprint(index.digest for index in self.indexes),
+            self.chat_history,
+            user_input,
+        )
+        self.chat_history.append({"role": "user", "content": user_input})
+        return cache_key
+
+    def build_prompt(self):
+        """Return (prompt, sections) for the latest user message.
+
+        `sections` maps persona / corpus / history / user to the text that went
+        into each part of the prompt, for token accounting.
+        """
+        with telemetry.span("prompt_build", persona=self.persona.slug) as fields:
+            user_input = self.chat_history[-1]["content"]
+            # Only the recipe records and cookbook passages relevant to this
+            # conversation go into the prompt
+            query = retrieval.build_query(self.chat_history)
+            recipes = recipe_store.search(query, sources=self.source_digests)
+            if semantic.enabled():
+                # Embedding search catches mood-style questions that share no words with the
+                # recipes; the keyword-matched recipe records are fused in as one more ranking
+                context = "fused"
+                passages = semantic.retrieve(self.indexes, query)
+                cookbook = retrieval.format_passages(
+                    semantic.fuse([passages, [format_recipes([recipe]) for recipe in recipes]])
+                )
+            elif recipes:
+                context = "recipes"
+                cookbook = format_recipes(recipes)
+            else:
+                context = "passages"
+                cookbook = retrieval.format_passages(retrieval.retrieve(self.indexes, query))
+            # Recent turns verbatim, older ones folded into a summary (see history.py)
+            history = self.history.render(self.chat_history[:-1])
+            sections = {
+                "persona": self.persona.prompt,
+                "corpus": cookbook,
+                "history": history,
+                "user": user_input,
+            }
+            prompt = PROMPT_TEMPLATE.format(
+                persona=self.persona.prompt, cookbook=cookbook, history=history, user_input=user_input
+            )
+            fields["context"] = context
+            fields["prompt_chars"] = len(prompt)
+        telemetry.observe("culinary_prompt_chars", len(prompt), persona=self.persona.slug)
+        return prompt, sections
+
+    def begin_turn(self, user_input, api_key, stream=True, bypass_cache=False, suggest_dishes=True):
+        """Answer `user_input` from the catalog or the cache, or start the model's answer; returns a Turn."""
+        turn = self._answer_locally(user_input, bypass_cache, suggest_dishes)
+        if turn.kind != "model":
+            return turn
+        # One shared model per API key, reused across reruns and sessions
+        model = model_pool.get_model(api_key)
+        started = time.perf_counter()
+        prompt, turn.sections = self.build_prompt()
+        turn.timings["prompt_build"] = time.perf_counter() - started
+        turn.answer = streaming.TimedStream(model, prompt, stream=stream)
+        turn.answer.start()
+        return turn
+
+    async def begin_turn_async(self, user_input, api_key, stream=True, bypass_cache=False, suggest_dishes=True):
+        """`begin_turn` for asyncio callers: blocking steps run in a thread, the model call on the loop."""
+        turn = await asyncio.to_thread(self._answer_locally, user_input, bypass_cache, suggest_dishes)
+        if turn.kind != "model":
+            return turn
+        model = model_pool.get_model(api_key, asynchronous=True)
+        started = time.perf_counter()
+        prompt, turn.sections = await asyncio.to_thread(self.build_prompt)
+        turn.timings["prompt_build"] = time.perf_counter() - started
+        turn.answer = streaming.AsyncTimedStream(model, prompt, stream=stream)
+        await turn.answer.start()
+        return turn
+
+    def _answer_locally(self, user_input, bypass_cache, suggest_dishes):
+        """The steps of a turn before the model: a finished Turn if one answers, else a "model" Turn to fill in."""
+        started = time.perf_counter()
+        cache_key = self.start_turn(user_input)
+        timings = {}
+        dishes = self.suggest_dishes(user_input) if suggest_dishes else []
+        timings["shortlist_lookup"] = time.perf_counter() - started
+        if dishes:
+            # A mood or diet request: a shortlist from the dish catalog, no network call
+            text = format_shortlist(dishes, self.persona)
+            metrics = {
+                "shortlist": [dish["title"] for dish in dishes],
+                "total_s": round(time.perf_counter() - started, 3),
+                "response_chars": len(text),
+            }
+            self.finish_turn(text, metrics)
+            return Turn(self, "shortlist", text, metrics, dishes=dishes, timings=timings)
+
+        lookup_started = time.perf_counter()
+        cached_answer = None if bypass_cache else answer_cache.get(cache_key)
+        timings["cache_lookup"] = time.perf_counter() - lookup_started
+        if cached_answer is not None:
+            # Same question against the same cookbooks: no network call
+            metrics = {
+                "cache_hit": True,
+                "total_s": round(time.perf_counter() - started, 3),
+                "response_chars": len(cached_answer),
+            }
+            self.finish_turn(cached_answer, metrics)
+            return Turn(self, "cached", cached_answer, metrics, timings=timings)
+        return Turn(self, "model", cache_key=cache_key, bypass_cache=bypass_cache, timings=timings)
+
+    def finish_turn(self, answer, metrics):
+        self.chat_history.append({"role": "assistant", "content": answer})
+        self.turn_metrics.append(metrics)
+        if self.conversation_id is not None:
+            conversation_store.append(
+                self.conversation_id, self.user_id, self.persona.slug, self.chat_history[-2:]
+            )
@@ -0,0 +1,225 @@
+"""Saved conversations, so a reload or a server restart doesn't lose the chat.
+
+Messages are appended to SQLite (WAL mode) as each turn finishes, never
+rewritten, and each conversation records its user and persona. Every message is
+stored with its summary line (see history.summary_line), so resuming reads
+only the last CULINARY_RESUME_MESSAGES messages in full and the summary lines
+of the ones before, newest first until the history summary budget is full.
+
+Run `python -m culinary_heritage.conversations [--idle-days N]` from cron to
+compact conversations idle for N days (default CULINARY_COMPACT_IDLE_DAYS, 7):
+all but their recent messages are folded into the stored summary and deleted.
+"""
+import os
+import secrets
+import sqlite3
+import time
+
+from .history import SUMMARY_TOKEN_BUDGET, estimate_tokens, summary_line
+from .pdf_cache import CACHE_DIR
+
+RESUME_MESSAGES = int(os.environ.get("CULINARY_RESUME_MESSAGES", 20))
+COMPACT_IDLE_S = float(os.environ.get("CULINARY_COMPACT_IDLE_DAYS", 7)) * 24 * 3600
+
+
+def new_conversation_id():
+    return secrets.token_urlsafe(16)
+
+
+class SavedConversation:
+    """What `ConversationStore.resume` reads back: the recent messages and a summary of the rest."""
+
+    def __init__(self, conversation_id, user_id, persona, messages, summary_lines, first_seq, earlier_count):
+        self.id = conversation_id
+        self.user_id = user_id
+        self.persona = persona
+        self.messages = messages
+        self.summary_lines = summary_lines
+        # Position of messages[0] in the conversation, and how many older
+        # messages are still stored in full for `earlier` to page in
+        self.first_seq = first_seq
+        self.earlier_count = earlier_count
+
+
+class ConversationStore:
+    def __init__(self, path=os.path.join(CACHE_DIR, "conversations.db")):
+        self.path = path
+        self._initialized = False
+
+    def _connect(self):
+        # A connection per call: Streamlit serves each session from its own thread
+        if not self._initialized:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS conversations (
+                    id TEXT PRIMARY KEY, user_id TEXT NOT NULL, persona TEXT NOT NULL,
+                    title TEXT NOT NULL, created_at REAL NOT NULL, updated_at REAL NOT NULL,
+                    message_count INTEGER NOT NULL, compacted INTEGER NOT NULL, summary TEXT NOT NULL);
+                CREATE INDEX IF NOT EXISTS conversations_updated ON conversations (updated_at);
+                CREATE TABLE IF NOT EXISTS messages (
+                    conversation_id TEXT NOT NULL, seq INTEGER NOT NULL, role TEXT NOT NULL,
+                    content TEXT NOT NULL, summary_line TEXT NOT NULL, created_at REAL NOT NULL,
+                    PRIMARY KEY (conversation_id, seq)) WITHOUT ROWID;
+            """)
+            self._initialized = True
+        return conn
+
+    def create(self, conversation_id, user_id, persona):
+        conn = self._connect()
+        try:
+            with conn:
+                self._insert(conn, conversation_id, user_id, persona, time.time())
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _insert(conn, conversation_id, user_id, persona, now):
+        conn.execute(
+            "INSERT OR IGNORE INTO conversations"
+            " (id, user_id, persona, title, created_at, updated_at, message_count, compacted, summary)"
+            " VALUES (?, ?, ?, '', ?, ?, 0, 0, '')",
+            (conversation_id, user_id or "", persona, now, now),
+        )
+
+    def append(self, conversation_id, user_id, persona, messages):
+        """Add `messages` (role/content dicts) to the end of a conversation, creating it if new."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                self._insert(conn, conversation_id, user_id, persona, now)
+                count, title = conn.execute(
+                    "SELECT message_count, title FROM conversations WHERE id = ?", (conversation_id,)
+                ).fetchone()
+                conn.executemany(
+                    "INSERT INTO messages (conversation_id, seq, role, content, summary_line, created_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    [(conversation_id, count + i, m["role"], m["content"], summary_line(m), now)
+                     for i, m in enumerate(messages)],
+                )
+                if not title:
+                    title = next((m["content"][:80] for m in messages if m["role"] == "user"), "")
+                conn.execute(
+                    "UPDATE conversations SET message_count = ?, title = ?, updated_at = ? WHERE id = ?",
+                    (count + len(messages), title, now, conversation_id),
+                )
+        finally:
+            conn.close()
+
+    def resume(self, conversation_id, recent=RESUME_MESSAGES):
+        """Read back a conversation for resuming, or None if there is no such conversation."""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT user_id, persona, message_count, compacted, summary FROM conversations WHERE id = ?",
+                (conversation_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            user_id, persona, count, compacted, summary = row
+            first = max(compacted, count - recent)
+            messages = [
+                {"role": role, "content": content}
+                for role, content in conn.execute(
+                    "SELECT role, content FROM messages WHERE conversation_id = ? AND seq >= ? ORDER BY seq",
+                    (conversation_id, first),
+                )
+            ]
+            # Only as many summary lines as the prompt's summary budget can hold
+            lines = []
+            budget = SUMMARY_TOKEN_BUDGET
+            older = conn.execute(
+                "SELECT summary_line FROM messages WHERE conversation_id = ? AND seq < ? ORDER BY seq DESC",
+                (conversation_id, first),
+            )
+            for (line,) in older:
+                budget -= estimate_tokens(line) + 1
+                if budget < 0:
+                    break
+                lines.append(line)
+            else:
+                for line in reversed(summary.splitlines()):
+                    budget -= estimate_tokens(line) + 1
+                    if budget < 0:
+                        break
+                    lines.append(line)
+            lines.reverse()
+        finally:
+            conn.close()
+        return SavedConversation(conversation_id, user_id, persona, messages, lines, first, first - compacted)
+
+    def earlier(self, conversation_id, before_seq, limit=RESUME_MESSAGES):
+        """Up to `limit` messages of a conversation from just before message number `before_seq`."""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT role, content FROM messages WHERE conversation_id = ? AND seq < ?"
+                " ORDER BY seq DESC LIMIT ?",
+                (conversation_id, before_seq, limit),
+            ).fetchall()
+        finally:
+            conn.close()
+        return [{"role": role, "content": content} for role, content in reversed(rows)]
+
+    def delete(self, conversation_id):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
+                return conn.execute("DELETE FROM conversations WHERE id = ?", (conversation_id,)).rowcount > 0
+        finally:
+            conn.close()
+
+    def compact(self, idle_s=COMPACT_IDLE_S, keep=RESUME_MESSAGES):
+        """Fold all but the last `keep` messages of idle conversations into their summary.
+
+        Returns the number of conversations compacted.
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            candidates = conn.execute(
+                "SELECT id, message_count, compacted, summary FROM conversations"
+                " WHERE updated_at < ? AND message_count - compacted > ?",
+                (now - idle_s, keep),
+            ).fetchall()
+            for conversation_id, count, compacted, summary in candidates:
+                upto = count - keep
+                with conn:
+                    lines = summary.splitlines() + [
+                        line for (line,) in conn.execute(
+                            "SELECT summary_line FROM messages WHERE conversation_id = ? AND seq < ? ORDER BY seq",
+                            (conversation_id, upto),
+                        )
+                    ]
+                    # The same cap the prompt puts on the summary (see history.py)
+                    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > SUMMARY_TOKEN_BUDGET:
+                        lines.pop(0)
+                    conn.execute(
+                        "UPDATE conversations SET compacted = ?, summary = ? WHERE id = ?",
+                        (upto, "\n".join(lines), conversation_id),
+                    )
+                    conn.execute("DELETE FROM messages WHERE conversation_id = ? AND seq < ?",
+                                 (conversation_id, upto))
+            if candidates:
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        finally:
+            conn.close()
+        return len(candidates)
+
+
+conversation_store = ConversationStore()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compact idle saved conversations.")
+    parser.add_argument("--idle-days", type=float, default=COMPACT_IDLE_S / (24 * 3600))
+    parser.add_argument("--keep", type=int, default=RESUME_MESSAGES, help="recent messages kept in full")
+    args = parser.parse_args()
+    compacted = conversation_store.compact(args.idle_days * 24 * 3600, args.keep)
+    print(f"Compacted {compacted} conversations.")
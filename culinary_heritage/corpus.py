@@ -0,0 +1,116 @@
+"""The bundled cookbooks, loaded once per process and shared by every persona and session.
+
+`start_warming` loads and indexes them on a background thread when the server
+starts (see serve.py; app.py also calls it on its first run), and `warm_status`
+lets a session check on that without blocking. `load_bundled` is the blocking
+path, for scripts and benchmarks.
+"""
+import collections
+import os
+import threading
+
+from . import ROOT_DIR, ingest, retrieval, semantic, telemetry
+from .catalog import get_catalog
+from .pdf_cache import pdf_text_cache
+from .recipe_db import BUNDLED_SOURCE_TAGS, recipe_store
+
+# One index per cookbook, each reading from that cookbook's memory-mapped text,
+# and the dish catalog of all of them (see catalog.py)
+BundledCorpus = collections.namedtuple("BundledCorpus", ["indexes", "digests", "catalog"], defaults=(None,))
+
+_corpora = {}
+_corpora_lock = threading.Lock()
+
+
+class WarmStatus:
+    """Progress of one bundled corpus loading in the background."""
+
+    def __init__(self):
+        self.done = 0
+        self.total = 0
+        self.corpus = None
+        self.error = None
+        self.finished = threading.Event()
+
+    @property
+    def ready(self):
+        return self.finished.is_set()
+
+    def _progress(self, done, total):
+        self.done, self.total = done, total
+
+
+_warming = {}
+_warming_lock = threading.Lock()
+
+
+def start_warming(pdf_name_sets):
+    """Load each set of bundled cookbooks on a background thread, once per process."""
+    return [warm_status(pdf_names) for pdf_names in pdf_name_sets]
+
+
+def warm_status(pdf_names):
+    """The WarmStatus for `pdf_names`, starting the background load if nobody has yet."""
+    key = tuple(pdf_names)
+    with _warming_lock:
+        status = _warming.get(key)
+        if status is None:
+            status = _warming[key] = WarmStatus()
+            threading.Thread(
+                target=_warm, args=(key, status), name=f"warm-corpus-{len(_warming)}", daemon=True
+            ).start()
+        return status
+
+
+def _warm(pdf_names, status):
+    try:
+        status.corpus = load_bundled(pdf_names, on_progress=status._progress)
+    except Exception as e:
+        # Recorded by the corpus_load span; sessions fall back to uploads only
+        status.error = e
+    finally:
+        status.finished.set()
+
+
+def load_bundled(pdf_names, on_progress=None):
+    """Return the shared corpus for `pdf_names` (files in the repository root).
+
+    The first caller extracts (or loads from the disk cache) and indexes the
+    cookbooks; concurrent callers wait for it and then share the result.
+    Missing files are skipped.
+    """
+    paths = [os.path.join(ROOT_DIR, name) for name in pdf_names]
+    paths = [path for path in paths if os.path.exists(path)]
+    key = tuple(pdf_text_cache.digest_for_path(path) for path in paths)
+    with _corpora_lock:
+        corpus = _corpora.get(key)
+        if corpus is None:
+            corpus = _corpora[key] = _load(paths, on_progress)
+        return corpus
+
+
+def _load(paths, on_progress):
+    with telemetry.span("corpus_load", documents=len(paths)) as fields:
+        corpus = _build(paths, on_progress)
+        fields["corpus_bytes"] = sum(len(index.source) for index in corpus.indexes)
+        return corpus
+
+
+def _build(paths, on_progress):
+    indexes = []
+    digests = []
+    names = []
+    for path, digest in zip(paths, ingest.load_cached(paths, pdf_text_cache, on_progress)):
+        if digest is None:
+            continue
+        # Structured recipes for indexed lookups (see recipe_db.py); stored once per cookbook
+        name = os.path.basename(path)
+        recipe_store.add_source(digest, name, pdf_text_cache.pages(digest), BUNDLED_SOURCE_TAGS.get(name, ()))
+        index = retrieval.get_index(pdf_text_cache.buffer(digest))
+        if semantic.enabled():
+            # Embed every chunk now, in batches, rather than on the first question
+            semantic.get_vectors(index)
+        indexes.append(index)
+        digests.append(digest)
+        names.append(name)
+    return BundledCorpus(tuple(indexes), tuple(digests), get_catalog(zip(digests, names)))
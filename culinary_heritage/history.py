@@ -0,0 +1,115 @@
+"""Token-budgeted conversation history for the prompt.
+
+The last few turns go into the prompt word for word. Older messages are folded,
+once each, into a running summary, so the history section stays under a fixed
+token budget however long the conversation gets. The latest exchange is never
+folded: follow-ups like "how do I temper it?" need the recipe it refers to, so
+when it alone is over budget it is shortened in the middle instead.
+"""
+
+HISTORY_TOKEN_BUDGET = 3000
+KEEP_TURNS = 3  # user + assistant exchanges kept verbatim
+MIN_KEEP_MESSAGES = 2  # the latest exchange, shortened rather than folded
+SUMMARY_TOKEN_BUDGET = 600
+SUMMARY_LINE_CHARS = 200
+
+
+def estimate_tokens(text):
+    # Gemini averages roughly 4 characters per token on English text
+    return len(text) // 4
+
+
+def section_tokens(sections):
+    """Estimated prompt tokens per named section, plus the total."""
+    tokens = {name: estimate_tokens(text) for name, text in sections.items()}
+    tokens["total"] = sum(tokens.values())
+    return tokens
+
+
+def _gist(text):
+    """First sentence or line of a message, capped at SUMMARY_LINE_CHARS."""
+    text = " ".join(text.split())
+    for end in (". ", "? ", "! "):
+        cut = text.find(end)
+        if 0 < cut < SUMMARY_LINE_CHARS:
+            return text[:cut + 1]
+    if len(text) > SUMMARY_LINE_CHARS:
+        return text[:SUMMARY_LINE_CHARS].rsplit(" ", 1)[0] + "..."
+    return text
+
+
+def _shorten(text, max_chars):
+    """`text` cut to about `max_chars`, keeping its start and end."""
+    if len(text) <= max_chars:
+        return text
+    half = max(1, max_chars // 2)
+    return f"{text[:half].rstrip()} [...] {text[-half:].lstrip()}"
+
+
+def summary_line(message):
+    """The line a message becomes once it is folded into the summary."""
+    who = "User said" if message["role"] == "user" else "You replied"
+    return f"- {who}: {_gist(message['content'])}"
+
+
+class HistoryManager:
+    """Renders chat history for the prompt within `token_budget`.
+
+    Keep one instance per conversation (in session state): `folded` counts the
+    messages already summarized, so each message is only folded once.
+    """
+
+    def __init__(self, token_budget=HISTORY_TOKEN_BUDGET, keep_turns=KEEP_TURNS,
+                 summary_budget=SUMMARY_TOKEN_BUDGET):
+        self.token_budget = token_budget
+        self.keep_turns = keep_turns
+        self.summary_budget = summary_budget
+        self.summary_lines = []
+        self.folded = 0
+
+    def _fold(self, messages, upto):
+        for message in messages[self.folded:upto]:
+            self.summary_lines.append(summary_line(message))
+        self.folded = max(self.folded, upto)
+        # Drop the oldest lines once the summary outgrows its own budget
+        while len(self.summary_lines) > 1 and \
+                estimate_tokens("\n".join(self.summary_lines)) > self.summary_budget:
+            self.summary_lines.pop(0)
+
+    def _format(self, recent):
+        parts = []
+        if self.summary_lines:
+            parts.append("Summary of the earlier conversation:\n" + "\n".join(self.summary_lines))
+        if recent:
+            parts.append("\n".join(
+                f"{'User' if m['role'] == 'user' else 'You'}: {m['content']}" for m in recent
+            ))
+        return "\n\n".join(parts) or "(This is the start of the conversation.)"
+
+    def _fit(self, recent):
+        """Shorten `recent` so the rendered history fits the token budget, sharing it fairly."""
+        used = estimate_tokens(self._format([])) if self.summary_lines else 0
+        # Each message gets an even share; what short ones don't need goes to the long ones
+        remaining = max((self.token_budget - used) * 4, SUMMARY_LINE_CHARS * len(recent))
+        fitted = list(recent)
+        by_length = sorted(range(len(recent)), key=lambda i: len(recent[i]["content"]))
+        for n, i in enumerate(by_length):
+            share = remaining // (len(recent) - n)
+            content = _shorten(recent[i]["content"], share)
+            fitted[i] = {**recent[i], "content": content}
+            remaining -= len(content)
+        return fitted
+
+    def render(self, messages):
+        """Return the history section of the prompt for `messages`."""
+        keep = self.keep_turns * 2
+        while True:
+            start = max(self.folded, len(messages) - keep)
+            self._fold(messages, start)
+            text = self._format(messages[start:])
+            if estimate_tokens(text) <= self.token_budget:
+                return text
+            if keep <= MIN_KEEP_MESSAGES:
+                return self._format(self._fit(messages[start:]))
+            # Over budget: fold one more message into the summary and retry
+            keep -= 1
@@ -0,0 +1,182 @@
+"""Parallel PDF ingestion.
+
+Pages are extracted in a process pool across all files at once, and results
+are streamed back batch by batch so the UI can show a progress bar. Page texts
+are collected in lists and joined once per document. Pages that turn out to be
+scanned images go through OCR (see ocr.py) in the same pool, a page per task.
+"""
+import collections
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import PyPDF2
+
+from . import ocr, telemetry
+
+# Pages handed to a worker per task; each task re-opens the PDF, so keep it coarse
+PAGES_PER_TASK = 8
+MAX_WORKERS = int(os.environ.get("CULINARY_INGEST_WORKERS", 0)) or os.cpu_count() or 1
+
+# ocr_pages: pages read with OCR; unread_pages: scanned pages OCR couldn't read (or isn't installed for)
+ExtractedDocument = collections.namedtuple(
+    "ExtractedDocument", ["name", "pages", "error", "ocr_pages", "unread_pages"], defaults=(0, 0)
+)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Streamlit runs many threads, so don't fork it; spawn clean workers once and reuse them
+            _executor = ProcessPoolExecutor(
+                max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _executor
+
+
+def _reset_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _read_pages(path, start, stop):
+    """Page texts, with None for pages that are only images (scans)."""
+    pdf_reader = PyPDF2.PdfReader(path)
+    texts = []
+    for i in range(start, stop):
+        page = pdf_reader.pages[i]
+        text = page.extract_text() or ""
+        texts.append(None if not text.strip() and ocr.has_images(page) else text)
+    return texts
+
+
+def extract_documents(documents, on_progress=None):
+    """Extract the text of several PDFs in parallel.
+
+    `documents` is a list of (name, source) pairs, where source is a file path
+    or the PDF's bytes. `on_progress(done_pages, total_pages)` is called from
+    the calling thread as batches of pages finish; scanned pages found on the
+    way are added to the total and counted as OCR finishes them. Returns one
+    ExtractedDocument (with a list of page texts) per input, in order; a
+    document that fails keeps the pages that were read and carries the
+    exception in `error`.
+    """
+    with telemetry.span("ingest", documents=len(documents)) as fields, \
+            tempfile.TemporaryDirectory() as tmp_dir:
+        paths = []
+        for i, (name, source) in enumerate(documents):
+            if isinstance(source, (bytes, bytearray)):
+                # Workers get a path rather than the bytes, so big scans aren't pickled per task
+                path = os.path.join(tmp_dir, f"{i}.pdf")
+                with open(path, "wb") as f:
+                    f.write(source)
+                source = path
+            paths.append(source)
+
+        pages = [[] for _ in documents]
+        errors = [None] * len(documents)
+        tasks = []
+        for i, path in enumerate(paths):
+            try:
+                n_pages = len(PyPDF2.PdfReader(path).pages)
+            except Exception as e:
+                errors[i] = e
+                continue
+            pages[i] = [""] * n_pages
+            tasks.extend((i, start, min(start + PAGES_PER_TASK, n_pages))
+                         for start in range(0, n_pages, PAGES_PER_TASK))
+
+        total = sum(stop - start for _, start, stop in tasks)
+        done = 0
+        scanned = []
+        for (i, start, stop), result in _run_tasks(_read_pages, [
+                ((i, start, stop), (paths[i], start, stop)) for i, start, stop in tasks]):
+            if isinstance(result, Exception):
+                errors[i] = errors[i] or result
+            else:
+                for page_number, text in enumerate(result, start):
+                    if text is None:
+                        scanned.append((i, page_number))
+                pages[i][start:stop] = [text or "" for text in result]
+            done += stop - start
+            if on_progress:
+                on_progress(done, total)
+
+        ocr_pages = [0] * len(documents)
+        unread_pages = [0] * len(documents)
+        if scanned and ocr.available():
+            total += len(scanned)
+            for (i, page_number), result in _run_tasks(ocr.read_page, [
+                    ((i, page_number), (paths[i], page_number)) for i, page_number in scanned]):
+                if isinstance(result, Exception):
+                    # A page that times out or fails stays empty; the rest of the document is fine
+                    unread_pages[i] += 1
+                else:
+                    pages[i][page_number] = result
+                    ocr_pages[i] += 1
+                done += 1
+                if on_progress:
+                    on_progress(done, total)
+        else:
+            for i, _ in scanned:
+                unread_pages[i] += 1
+        fields["pages"] = total
+        fields["ocr_pages"] = sum(ocr_pages)
+        fields["unread_pages"] = sum(unread_pages)
+        fields["failed_documents"] = sum(error is not None for error in errors)
+
+    return [
+        ExtractedDocument(name, doc_pages, error, n_ocr, n_unread)
+        for (name, _), doc_pages, error, n_ocr, n_unread in zip(documents, pages, errors, ocr_pages, unread_pages)
+    ]
+
+
+def _run_tasks(function, tasks):
+    """Call `function(*args)` for each (key, args) task; yield (key, result-or-exception) as they complete."""
+    if MAX_WORKERS == 1 or len(tasks) <= 1:
+        # Not worth the round-trip to the pool
+        for key, args in tasks:
+            try:
+                yield key, function(*args)
+            except Exception as e:
+                yield key, e
+        return
+
+    executor = _get_executor()
+    futures = {executor.submit(function, *args): key for key, args in tasks}
+    for future in as_completed(futures):
+        try:
+            yield futures[future], future.result()
+        except BrokenProcessPool as e:
+            _reset_executor()
+            yield futures[future], e
+        except Exception as e:
+            yield futures[future], e
+
+
+def load_cached(paths, cache, on_progress=None):
+    """Make sure every PDF in `paths` is in `cache`, extracting misses in parallel.
+
+    Returns the digest of each PDF, or None for one that failed to extract
+    (it is not cached, so a later call retries it).
+    """
+    digests = [cache.digest_for_path(path) for path in paths]
+    missing = [i for i, digest in enumerate(digests) if cache.buffer(digest) is None]
+    if missing:
+        results = extract_documents([(paths[i], paths[i]) for i in missing], on_progress)
+        for i, result in zip(missing, results):
+            if result.error is None:
+                cache.store(digests[i], result.pages)
+            else:
+                digests[i] = None
+    return digests
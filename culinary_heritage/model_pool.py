@@ -0,0 +1,247 @@
+"""Shared Gemini models, a process-wide concurrency limit and retries.
+
+`genai.configure` sets a process-global API key and `GenerativeModel` only
+binds its client on first use, so building both on every message is slow and
+races when sessions use different keys. Models are instead built once per API
+key and bound to their client straight away, under a lock. Calls go through
+`generate_content`, which caps concurrent requests and retries rate-limit and
+server errors with exponential backoff. `generate_content_async` does the same
+for asyncio callers (the HTTP API, see api.py), with a cap of its own.
+"""
+import asyncio
+import hashlib
+import itertools
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+
+import google.generativeai as genai
+from google.generativeai import client as genai_client
+
+from . import telemetry
+
+# If you have access to Pro, change 'flash' to 'pro'.
+MODEL_NAME = "gemini-2.5-flash"
+
+MAX_CONCURRENT_CALLS = int(os.environ.get("CULINARY_MAX_CONCURRENT_CALLS", 8))
+# How long a message waits for a free slot before giving up
+SLOT_TIMEOUT_S = 60
+MAX_ATTEMPTS = 4
+BACKOFF_BASE_S = 1.0
+BACKOFF_MAX_S = 16.0
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+MAX_MODELS = 64
+
+
+class ModelBusyError(RuntimeError):
+    """Raised when no call slot frees up within SLOT_TIMEOUT_S."""
+
+
+class EmptyAnswerError(RuntimeError):
+    """Raised when an answer ends without any text, e.g. blocked by a safety filter."""
+
+
+_models = OrderedDict()
+_models_lock = threading.Lock()
+_call_slots = threading.BoundedSemaphore(MAX_CONCURRENT_CALLS)
+_async_call_slots = asyncio.BoundedSemaphore(MAX_CONCURRENT_CALLS)
+
+
+def get_model(api_key, model_name=MODEL_NAME, asynchronous=False):
+    """Return the shared model for `api_key`, building it on first use.
+
+    Pass `asynchronous=True` from inside the event loop that will make
+    `generate_content_async` calls, so the async client is bound there too.
+    """
+    key = (hashlib.sha256(api_key.encode("utf-8")).hexdigest(), model_name)
+    with _models_lock:
+        model = _models.get(key)
+        if model is None:
+            genai.configure(api_key=api_key)
+            model = genai.GenerativeModel(model_name)
+            # Bind the client while this key is the configured one, so a later
+            # configure() for another session's key can't leak into this model
+            model._client = genai_client.get_default_generative_client()
+            _models[key] = model
+            if len(_models) > MAX_MODELS:
+                _models.popitem(last=False)
+        else:
+            _models.move_to_end(key)
+        if asynchronous and model._async_client is None:
+            genai.configure(api_key=api_key)
+            model._async_client = genai_client.get_default_generative_async_client()
+        return model
+
+
+def status_code(exc):
+    """HTTP status of a Google API error, or None for anything else."""
+    code = getattr(exc, "code", None)
+    return code if isinstance(code, int) else None
+
+
+def is_retryable(exc):
+    return status_code(exc) in RETRYABLE_STATUS_CODES
+
+
+def backoff_delay(attempt):
+    """Full-jitter exponential backoff for retry number `attempt` (1-based)."""
+    return random.uniform(0, min(BACKOFF_MAX_S, BACKOFF_BASE_S * 2 ** (attempt - 1)))
+
+
+def _with_retries(call):
+    for attempt in itertools.count(1):
+        try:
+            return call()
+        except Exception as e:
+            if attempt >= MAX_ATTEMPTS or not is_retryable(e):
+                raise
+            telemetry.count("culinary_model_retries_total", status=status_code(e))
+            time.sleep(backoff_delay(attempt))
+
+
+async def _with_retries_async(call):
+    for attempt in itertools.count(1):
+        try:
+            return await call()
+        except Exception as e:
+            if attempt >= MAX_ATTEMPTS or not is_retryable(e):
+                raise
+            telemetry.count("culinary_model_retries_total", status=status_code(e))
+            await asyncio.sleep(backoff_delay(attempt))
+
+
+def generate_content(model, prompt, stream=False):
+    """Call `model.generate_content` within the concurrency limit, with retries.
+
+    With `stream=True` this returns an iterator of response chunks; the first
+    chunk is fetched (and retried) before returning, and the call slot is held
+    until the iterator is exhausted or closed.
+    """
+    with telemetry.span("model_slot_wait"):
+        if not _call_slots.acquire(timeout=SLOT_TIMEOUT_S):
+            raise ModelBusyError("Too many conversations are cooking at once.")
+    if not stream:
+        try:
+            with telemetry.span("model_call", stream=False, prompt_chars=len(prompt)):
+                return _with_retries(lambda: model.generate_content(prompt))
+        finally:
+            _call_slots.release()
+
+    def first_chunk():
+        chunks = iter(model.generate_content(prompt, stream=True))
+        return chunks, next(chunks, None)
+
+    try:
+        with telemetry.span("model_call", stream=True, prompt_chars=len(prompt)):
+            chunks, first = _with_retries(first_chunk)
+    except BaseException:
+        _call_slots.release()
+        raise
+    return _SlotHoldingStream(chunks, first)
+
+
+class _SlotHoldingStream:
+    """Iterator over streamed chunks that frees the call slot once, when done or dropped."""
+
+    def __init__(self, chunks, first):
+        self._chunks = chunks
+        self._first = first
+        self._released = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._first is not None:
+            first, self._first = self._first, None
+            return first
+        try:
+            return next(self._chunks)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            _call_slots.release()
+
+    __del__ = close
+
+
+async def generate_content_async(model, prompt, stream=False):
+    """Async `generate_content`: same limit, retries and streaming behaviour.
+
+    With `stream=True` this returns an async iterator of response chunks that
+    holds its call slot until exhausted or closed.
+    """
+    with telemetry.span("model_slot_wait"):
+        try:
+            await asyncio.wait_for(_async_call_slots.acquire(), SLOT_TIMEOUT_S)
+        except asyncio.TimeoutError:
+            raise ModelBusyError("Too many conversations are cooking at once.") from None
+    if not stream:
+        try:
+            with telemetry.span("model_call", stream=False, prompt_chars=len(prompt)):
+                return await _with_retries_async(lambda: model.generate_content_async(prompt))
+        finally:
+            _async_call_slots.release()
+
+    async def first_chunk():
+        chunks = aiter(await model.generate_content_async(prompt, stream=True))
+        return chunks, await anext(chunks, None)
+
+    try:
+        with telemetry.span("model_call", stream=True, prompt_chars=len(prompt)):
+            chunks, first = await _with_retries_async(first_chunk)
+    except BaseException:
+        _async_call_slots.release()
+        raise
+    return _AsyncSlotHoldingStream(chunks, first)
+
+
+class _AsyncSlotHoldingStream:
+    """Async counterpart of _SlotHoldingStream."""
+
+    def __init__(self, chunks, first):
+        self._chunks = chunks
+        self._first = first
+        self._released = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._first is not None:
+            first, self._first = self._first, None
+            return first
+        try:
+            return await anext(self._chunks)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            _async_call_slots.release()
+
+    __del__ = close
+
+
+def describe_error(exc):
+    """A message for the chat window explaining why a turn failed."""
+    if isinstance(exc, ModelBusyError):
+        return "The kitchen is very busy right now. Please try again in a moment."
+    if isinstance(exc, EmptyAnswerError):
+        return "Gemini sent back an empty answer. Please try rephrasing your question."
+    code = status_code(exc)
+    if code == 429:
+        return "Gemini is rate-limiting this API key. Please wait a minute and try again."
+    if code in (400, 401, 403):
+        return f"Gemini rejected the request ({code}). Please check your API key."
+    if code in RETRYABLE_STATUS_CODES:
+        return f"Gemini is having trouble ({code}) even after retrying. Please try again shortly."
+    return f"An error occurred: {exc}"
@@ -0,0 +1,96 @@
+"""OCR fallback for scanned pages, such as photographed or handwritten family recipes.
+
+PyPDF2 returns no text for a page that is only a picture. `ingest` sends such
+pages here: the page's embedded images are read with Tesseract, one page per
+task in the ingestion process pool, each with a time limit. Results are cached
+on disk by a hash of the page's images, so a page is only read once even when
+it turns up again in another PDF (say, the same notebook rescanned with a few
+more pages).
+
+Needs pytesseract, Pillow and the `tesseract` binary; without them scanned
+pages stay empty. CULINARY_OCR_LANG (default "eng", e.g. "eng+hin" or
+"eng+mar") picks the Tesseract languages and CULINARY_OCR_TIMEOUT (seconds,
+default 60) the limit per page, shared by all of the page's images.
+"""
+import functools
+import hashlib
+import io
+import os
+import time
+
+import PyPDF2
+
+from .pdf_cache import CACHE_DIR
+
+OCR_LANG = os.environ.get("CULINARY_OCR_LANG", "eng")
+OCR_TIMEOUT_S = float(os.environ.get("CULINARY_OCR_TIMEOUT", 60))
+OCR_DIR = os.path.join(CACHE_DIR, "ocr")
+
+
+@functools.lru_cache(maxsize=1)
+def available():
+    """Whether pytesseract, Pillow and the tesseract binary are all installed."""
+    try:
+        import pytesseract
+        from PIL import Image  # noqa: F401
+    except ImportError:
+        return False
+    try:
+        pytesseract.get_tesseract_version()
+    except Exception:
+        return False
+    return True
+
+
+def has_images(page):
+    """Whether a PDF page draws any images, without decoding them."""
+    resources = page.get("/Resources")
+    xobjects = resources.get_object().get("/XObject") if resources is not None else None
+    if xobjects is None:
+        return False
+    for xobject in xobjects.get_object().values():
+        xobject = xobject.get_object()
+        if xobject.get("/Subtype") == "/Image" or (xobject.get("/Subtype") == "/Form" and has_images(xobject)):
+            return True
+    return False
+
+
+def _cache_file(page_hash):
+    return os.path.join(OCR_DIR, f"{page_hash}.{OCR_LANG}.txt")
+
+
+def read_page(path, page_number):
+    """OCR one page of the PDF at `path`; runs in a pool worker.
+
+    Returns the recognized text, "" for a page without images. Tesseract
+    errors and timeouts raise RuntimeError.
+    """
+    import pytesseract
+    from PIL import Image
+
+    images = [image.data for image in PyPDF2.PdfReader(path).pages[page_number].images]
+    if not images:
+        return ""
+    page_hash = hashlib.sha256(b"".join(hashlib.sha256(data).digest() for data in images)).hexdigest()
+    cache_file = _cache_file(page_hash)
+    if os.path.exists(cache_file):
+        with open(cache_file, encoding="utf-8") as f:
+            return f.read()
+
+    texts = []
+    deadline = time.monotonic() + OCR_TIMEOUT_S
+    for data in images:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise RuntimeError("Tesseract process timeout")
+        # pytesseract kills tesseract and raises RuntimeError once the timeout passes
+        text = pytesseract.image_to_string(Image.open(io.BytesIO(data)), lang=OCR_LANG, timeout=remaining)
+        texts.append(text.strip())
+    text = "\n".join(text for text in texts if text) + "\n"
+
+    os.makedirs(OCR_DIR, exist_ok=True)
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_file, cache_file)
+    return text
@@ -0,0 +1,187 @@
+"""On-disk cache for text extracted from cookbook PDFs.
+
+Extraction with PyPDF2 is slow (seconds per cookbook), so the text is stored
+once per process and once on disk, keyed by a hash of the PDF's bytes. A PDF is
+only re-extracted when its contents change.
+"""
+import array
+import hashlib
+import mmap
+import os
+import threading
+
+import PyPDF2
+
+from . import ROOT_DIR, telemetry
+
+# Bump this when the extraction logic changes so stale cache files are ignored.
+EXTRACTOR_VERSION = 4
+
+CACHE_DIR = os.environ.get(
+    "CULINARY_CACHE_DIR",
+    os.path.join(ROOT_DIR, ".pdf_cache"),
+)
+
+
+def content_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def text_version():
+    """The version cached text is stored under: EXTRACTOR_VERSION, plus whether OCR was available.
+
+    Text extracted without OCR has its scanned pages empty, so it is kept
+    apart and extracted again once OCR is installed.
+    """
+    from . import ocr  # ocr.py imports CACHE_DIR from here
+
+    return f"v{EXTRACTOR_VERSION}" if ocr.available() else f"v{EXTRACTOR_VERSION}-noocr"
+
+
+def extract_pdf_pages(stream):
+    """Extract the text of every page of a PDF file object."""
+    pdf_reader = PyPDF2.PdfReader(stream)
+    return [page.extract_text() or "" for page in pdf_reader.pages]
+
+
+def page_ends(pages):
+    """Offsets in the joined text where each page ends."""
+    ends = array.array("Q")
+    total = 0
+    for page in pages:
+        total += len(page)
+        ends.append(total)
+    return ends
+
+
+class PdfTextCache:
+    """Process-wide cache of extracted PDF text, backed by files in `cache_dir`.
+
+    Lookups go memory -> disk -> PyPDF2, and the counters `memory_hits`,
+    `disk_hits` and `misses` record which tier answered. The memory tier holds
+    a read-only memory map of each UTF-8 text file rather than a decoded
+    string, so a cookbook costs shared page cache instead of private memory
+    however many sessions and indexes use it (see `buffer`). Next to each text
+    file, a small `.pages` file holds the offset where each page ends.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._buffers = {}
+        self._page_ends = {}
+        # (path, mtime, size) -> digest, so unchanged files are not re-hashed on every session
+        self._path_digests = {}
+        self._lock = threading.Lock()
+
+    def _cache_file(self, digest):
+        return os.path.join(self.cache_dir, f"{digest}.{text_version()}.txt")
+
+    def _pages_file(self, digest):
+        return os.path.join(self.cache_dir, f"{digest}.{text_version()}.pages")
+
+    def digest_for_path(self, path):
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+        digest = self._path_digests.get(key)
+        if digest is None:
+            with open(path, "rb") as f:
+                digest = hashlib.file_digest(f, "sha256").hexdigest()
+            self._path_digests[key] = digest
+        return digest
+
+    def get_path(self, path):
+        """Return the text of the PDF at `path`."""
+        def extract():
+            with open(path, "rb") as f:
+                return extract_pdf_pages(f)
+        return self._get(self.digest_for_path(path), extract)
+
+    def buffer(self, digest):
+        """Return the cached UTF-8 text of `digest` as a shared read-only buffer, or None."""
+        with self._lock:
+            buffer = self._buffers.get(digest)
+            if buffer is not None:
+                self.memory_hits += 1
+                return buffer
+            cached = self._read(digest)
+            if cached is None:
+                return None
+            self.disk_hits += 1
+            self._buffers[digest], self._page_ends[digest] = cached
+            return cached[0]
+
+    def lookup(self, digest):
+        """Return cached text for `digest` from memory or disk, or None."""
+        buffer = self.buffer(digest)
+        return None if buffer is None else str(buffer, "utf-8")
+
+    def store(self, digest, pages):
+        """Record freshly extracted page texts for `digest` (counted as a miss)."""
+        text = "".join(pages)
+        ends = page_ends(pages)
+        with self._lock:
+            self.misses += 1
+            self._write(digest, text, ends)
+            # Serve it from the file just written, like any later lookup
+            self._buffers[digest], self._page_ends[digest] = self._read(digest)
+        return text
+
+    def pages(self, digest):
+        """Return the cached text of `digest` split back into pages, or None."""
+        text = self.lookup(digest)
+        if text is None:
+            return None
+        starts = [0, *self._page_ends[digest]]
+        return [text[start:end] for start, end in zip(starts, starts[1:])]
+
+    def _get(self, digest, extract):
+        text = self.lookup(digest)
+        if text is None:
+            text = self.store(digest, extract())
+        return text
+
+    def _read(self, digest):
+        cache_file = self._cache_file(digest)
+        pages_file = self._pages_file(digest)
+        if not (os.path.exists(cache_file) and os.path.exists(pages_file)):
+            return None
+        with open(cache_file, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                buffer = b""
+            else:
+                # The mapping outlives the file object, and survives the file being replaced
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        ends = array.array("Q")
+        with open(pages_file, "rb") as f:
+            ends.frombytes(f.read())
+        return buffer, ends
+
+    def _write(self, digest, text, ends):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Write to temp files and rename so other processes never see a half-written cache;
+        # the text file goes last because _read needs both
+        for path, data in [(self._pages_file(digest), ends.tobytes()),
+                           (self._cache_file(digest), text.encode("utf-8"))]:
+            tmp_file = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_file, "wb") as f:
+                f.write(data)
+            os.replace(tmp_file, path)
+
+    def stats(self):
+        hits = self.memory_hits + self.disk_hits
+        total = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": hits / total if total else 0.0,
+        }
+
+
+# Module-level instance: Streamlit imports this module once per server process,
+# so every session shares it.
+pdf_text_cache = PdfTextCache()
+telemetry.register_stats("pdf_text", pdf_text_cache.stats)
@@ -0,0 +1,64 @@
+"""Persona definitions, loaded from personas/*.toml.
+
+A persona is everything that used to differ between the copy-pasted app
+scripts: the prompt, page title and sidebar text, background image and the
+bundled cookbooks. Add a persona by dropping a new TOML file in personas/.
+"""
+import collections
+import glob
+import os
+import tomllib
+
+PERSONA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "personas")
+
+Persona = collections.namedtuple("Persona", [
+    "slug", "name", "order", "routed", "title", "page_title", "page_icon", "background", "bundled_pdfs",
+    "about_header", "about", "uploader_label", "chat_placeholder", "prompt",
+    "home_region", "shortlist_intro", "shortlist_outro",
+])
+
+REQUIRED = ("name", "title", "prompt")
+
+_DEFAULTS = {
+    "order": 100,
+    # Whether app.py gives the persona a route; app2.py's persona has none
+    "routed": True,
+    "page_title": "Satvik Chef",
+    "page_icon": "🥥",
+    "background": None,
+    "bundled_pdfs": (),
+    "about_header": None,
+    "about": "",
+    "uploader_label": "Upload PDF cookbooks",
+    "chat_placeholder": "How are you feeling? (e.g., Homesick, Hungry)",
+    # Catalog region a homesick user is offered (see catalog.py), and the
+    # persona's lines around a dish shortlist
+    "home_region": None,
+    "shortlist_intro": "From the family cookbooks, these would suit you:",
+    "shortlist_outro": "Pick one and I'll tell you how to make it.",
+}
+
+
+def load_persona(path):
+    with open(path, "rb") as f:
+        data = tomllib.load(f)
+    missing = [key for key in REQUIRED if key not in data]
+    if missing:
+        raise ValueError(f"{path}: missing persona settings {missing}")
+    slug = os.path.splitext(os.path.basename(path))[0].replace("_", "-")
+    fields = {**_DEFAULTS, **data, "slug": slug}
+    fields["bundled_pdfs"] = tuple(fields["bundled_pdfs"])
+    fields["prompt"] = fields["prompt"].strip()
+    if fields["about_header"] is None:
+        fields["about_header"] = f"Who Is {fields['name']}?"
+    unknown = set(fields) - set(Persona._fields)
+    if unknown:
+        raise ValueError(f"{path}: unknown persona settings {sorted(unknown)}")
+    return Persona(**fields)
+
+
+def load_personas(persona_dir=PERSONA_DIR):
+    """All personas, keyed by slug, in their configured order."""
+    personas = [load_persona(path) for path in glob.glob(os.path.join(persona_dir, "*.toml"))]
+    personas.sort(key=lambda p: (p.order, p.slug))
+    return {persona.slug: persona for persona in personas}
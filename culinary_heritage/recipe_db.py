@@ -0,0 +1,249 @@
+"""Structured recipes extracted from cookbook pages, stored in SQLite with FTS5.
+
+Each cookbook page is scanned for recipes (a capitalised title followed by
+ingredients and method), which are tagged (satvik, no-onion-garlic,
+vegetarian, ...) and stored with their source page. Questions like "what can I
+make with coconut and kokum" then become an indexed full-text query, and the
+matching records go into the prompt instead of raw page text.
+
+Run `python -m culinary_heritage.recipe_db [PDF ...]` to build the database ahead of time.
+"""
+import os
+import re
+import sqlite3
+import threading
+
+from .pdf_cache import CACHE_DIR
+from .retrieval import looks_like_title, tokenize
+
+# Bump this when the extraction heuristics change; sources are then re-extracted
+EXTRACTION_VERSION = 1
+
+INGREDIENT_HEADINGS = ("ingredients", "you will need", "you need")
+STEP_HEADINGS = ("method", "preparation", "directions", "procedure", "steps", "instructions")
+
+NON_VEG = frozenset(
+    "fish prawn prawns shrimp shrimps crab crabs mutton chicken meat egg eggs pomfret mackerel "
+    "bangda surmai sardine sardines clams tisrya kolambi bombil".split()
+)
+ONION_GARLIC = frozenset("onion onions garlic shallot shallots leek leeks chives".split())
+NOT_SATVIK = NON_VEG | ONION_GARLIC | frozenset(
+    "mushroom mushrooms alcohol wine vinegar tea coffee".split()
+)
+SWEET = frozenset("sugar jaggery gur gud honey".split())
+
+# Tags that apply to every recipe of a bundled cookbook
+BUNDLED_SOURCE_TAGS = {
+    "Rasachandrika__Saraswat_Cookery_Book_with_Notes_and_Home_Remedies.pdf": ("konkani", "saraswat"),
+    "the-hare-krsna-cookbook.pdf": ("iskcon",),
+}
+
+# Words that say what the user wants rather than what is in the dish
+QUERY_STOPWORDS = frozenset(
+    "make cook give recipe recipes dish dishes something some want like how which "
+    "please would could should tell about using use".split()
+)
+
+_QUANTITY_RE = re.compile(
+    r"^\s*(\d|½|¼|¾|a pinch|pinch|few|handful)|"
+    r"\b(cups?|tsp|tbsp|teaspoons?|tablespoons?|grams?|gms?|kgs?|ml|litres?|liters?|pieces?|nos)\b",
+    re.IGNORECASE,
+)
+# "no onion or garlic", "without garlic" should not count as using them
+_NEGATED_RE = re.compile(
+    r"\b(no|without|avoid)\s+(onions?|garlic)(\s+(or|and|nor|no)\s+(onions?|garlic))?",
+    re.IGNORECASE,
+)
+
+
+def _heading(line, headings):
+    """If `line` starts with one of `headings`, return the text after it, else None."""
+    lower = line.lower()
+    for heading in headings:
+        if lower.startswith(heading):
+            return line[len(heading):].lstrip(" :-–").strip()
+    return None
+
+
+def _split_inline(text):
+    return [item.strip() for item in re.split(r",|;", text) if item.strip()]
+
+
+def extract_recipes(pages):
+    """Find recipes in a cookbook's page texts.
+
+    Returns dicts with title, page (1-based), ingredients and steps (lists of
+    lines). A title line with no ingredients under it is treated as a section
+    heading and dropped.
+    """
+    recipes = []
+    current = None
+    section = None
+    for page_no, page in enumerate(pages, 1):
+        for line in page.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            ingredients = _heading(line, INGREDIENT_HEADINGS)
+            steps = _heading(line, STEP_HEADINGS)
+            if ingredients is None and steps is None and looks_like_title(line):
+                current = {"title": line.title(), "page": page_no, "ingredients": [], "steps": []}
+                recipes.append(current)
+                section = None
+            elif current is None:
+                continue
+            elif ingredients is not None:
+                section = "ingredients"
+                current["ingredients"].extend(_split_inline(ingredients))
+            elif steps is not None:
+                section = "steps"
+                if steps:
+                    current["steps"].append(steps)
+            elif section is not None:
+                current[section].append(line)
+            else:
+                current["ingredients" if _QUANTITY_RE.search(line) else "steps"].append(line)
+    return [recipe for recipe in recipes if recipe["ingredients"]]
+
+
+def tag_recipe(recipe):
+    words = set(tokenize(_NEGATED_RE.sub(" ", " ".join(recipe["ingredients"] + recipe["steps"]))))
+    tags = []
+    tags.append("non-veg" if words & NON_VEG else "vegetarian")
+    if not words & ONION_GARLIC:
+        tags.append("no-onion-garlic")
+    if not words & NOT_SATVIK:
+        tags.append("satvik")
+    if words & SWEET:
+        tags.append("sweet")
+    return tags
+
+
+class RecipeDB:
+    def __init__(self, path=os.path.join(CACHE_DIR, "recipes.db")):
+        self.path = path
+        self._initialized = False
+        self._known_sources = set()
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        # A connection per call: Streamlit serves each session from its own thread
+        if not self._initialized:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.row_factory = sqlite3.Row
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS sources (
+                    digest TEXT PRIMARY KEY, name TEXT NOT NULL, version INTEGER NOT NULL);
+                CREATE TABLE IF NOT EXISTS recipes (
+                    id INTEGER PRIMARY KEY, source_digest TEXT NOT NULL, source_name TEXT NOT NULL,
+                    page INTEGER NOT NULL, title TEXT NOT NULL, ingredients TEXT NOT NULL,
+                    steps TEXT NOT NULL, tags TEXT NOT NULL);
+                CREATE INDEX IF NOT EXISTS recipes_source ON recipes (source_digest);
+                CREATE VIRTUAL TABLE IF NOT EXISTS recipes_fts USING fts5(
+                    title, ingredients, steps, tags, tokenize='porter unicode61');
+            """)
+            self._initialized = True
+        return conn
+
+    def add_source(self, digest, name, pages, tags=()):
+        """Extract and store the recipes of one cookbook, unless already stored.
+
+        `digest` is the content hash of the PDF (see pdf_cache), so a cookbook
+        is extracted once however many sessions load it.
+        """
+        if digest in self._known_sources:
+            return
+        with self._lock:
+            conn = self._connect()
+            try:
+                row = conn.execute("SELECT version FROM sources WHERE digest = ?", (digest,)).fetchone()
+                if row is None or row["version"] != EXTRACTION_VERSION:
+                    with conn:
+                        self._replace_source(conn, digest, name, pages, tags)
+            finally:
+                conn.close()
+            self._known_sources.add(digest)
+
+    def _replace_source(self, conn, digest, name, pages, tags):
+        old_ids = [r["id"] for r in conn.execute("SELECT id FROM recipes WHERE source_digest = ?", (digest,))]
+        conn.executemany("DELETE FROM recipes_fts WHERE rowid = ?", [(i,) for i in old_ids])
+        conn.execute("DELETE FROM recipes WHERE source_digest = ?", (digest,))
+        for recipe in extract_recipes(pages):
+            record = (
+                recipe["title"],
+                "\n".join(recipe["ingredients"]),
+                "\n".join(recipe["steps"]),
+                " ".join([*tag_recipe(recipe), *tags]),
+            )
+            cursor = conn.execute(
+                "INSERT INTO recipes (source_digest, source_name, page, title, ingredients, steps, tags)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (digest, name, recipe["page"], *record),
+            )
+            conn.execute(
+                "INSERT INTO recipes_fts (rowid, title, ingredients, steps, tags) VALUES (?, ?, ?, ?, ?)",
+                (cursor.lastrowid, *record),
+            )
+        conn.execute(
+            "INSERT OR REPLACE INTO sources (digest, name, version) VALUES (?, ?, ?)",
+            (digest, name, EXTRACTION_VERSION),
+        )
+
+    def search(self, query, sources=None, limit=5):
+        """Best matching recipes for `query`, optionally limited to some source digests."""
+        terms = [t for t in tokenize(query) if t not in QUERY_STOPWORDS]
+        if not terms or sources is not None and not sources:
+            return []
+        sql = (
+            "SELECT r.*, bm25(recipes_fts, 5.0, 3.0, 1.0, 2.0) AS rank"
+            " FROM recipes_fts JOIN recipes r ON r.id = recipes_fts.rowid"
+            " WHERE recipes_fts MATCH ?"
+        )
+        params = [" OR ".join(f'"{t}"' for t in terms)]
+        if sources is not None:
+            sources = list(sources)
+            sql += f" AND r.source_digest IN ({', '.join('?' * len(sources))})"
+            params.extend(sources)
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+        conn = self._connect()
+        try:
+            return [dict(row) for row in conn.execute(sql, params)]
+        finally:
+            conn.close()
+
+
+def format_recipes(records):
+    """Render recipe records for the prompt."""
+    return "\n\n---\n\n".join(
+        f"{r['title']} ({r['source_name']}, page {r['page']})\n"
+        f"Tags: {r['tags']}\n"
+        f"Ingredients:\n{r['ingredients']}\n"
+        f"Method:\n{r['steps']}"
+        for r in records
+    )
+
+
+recipe_store = RecipeDB()
+
+
+if __name__ == "__main__":
+    import sys
+
+    from . import ROOT_DIR, ingest
+    from .pdf_cache import pdf_text_cache
+
+    pdf_paths = sys.argv[1:] or [
+        os.path.join(ROOT_DIR, name)
+        for name in BUNDLED_SOURCE_TAGS
+    ]
+    pdf_paths = [p for p in pdf_paths if os.path.exists(p)]
+    ingest.load_cached(pdf_paths, pdf_text_cache)
+    for pdf_path in pdf_paths:
+        digest = pdf_text_cache.digest_for_path(pdf_path)
+        name = os.path.basename(pdf_path)
+        recipe_store.add_source(digest, name, pdf_text_cache.pages(digest), BUNDLED_SOURCE_TAGS.get(name, ()))
+        print(f"{name}: {len(extract_recipes(pdf_text_cache.pages(digest)))} recipes")
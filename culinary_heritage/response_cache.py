@@ -0,0 +1,119 @@
+"""Local cache of model answers, so repeated questions skip the Gemini round-trip.
+
+Answers are stored in SQLite, keyed on the persona prompt, a fingerprint of
+the cookbook corpus, the normalized chat history and the normalized user
+input. Entries expire after a TTL and the least recently used ones are evicted
+once the cache holds more than `max_entries`.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+
+from . import telemetry
+from .pdf_cache import CACHE_DIR
+
+DEFAULT_TTL_S = int(os.environ.get("CULINARY_RESPONSE_CACHE_TTL", 7 * 24 * 3600))
+DEFAULT_MAX_ENTRIES = int(os.environ.get("CULINARY_RESPONSE_CACHE_SIZE", 5000))
+
+_NON_WORD_RE = re.compile(r"[^\w\s]+")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize(text):
+    """Lowercase, drop punctuation and collapse whitespace: "I'm homesick!" -> "im homesick"."""
+    return _SPACE_RE.sub(" ", _NON_WORD_RE.sub("", text.lower())).strip()
+
+
+def corpus_fingerprint(digests):
+    """Combine the content hashes of the cookbooks in play into one fingerprint."""
+    return hashlib.sha256("|".join(sorted(digests)).encode("utf-8")).hexdigest()
+
+
+def make_key(persona, corpus, chat_history, user_input):
+    payload = json.dumps([
+        hashlib.sha256(persona.encode("utf-8")).hexdigest(),
+        corpus,
+        [[message["role"], normalize(message["content"])] for message in chat_history],
+        normalize(user_input),
+    ])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path=os.path.join(CACHE_DIR, "responses.db"),
+                 ttl_s=DEFAULT_TTL_S, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._initialized = False
+
+    def _connect(self):
+        # A connection per call: Streamlit serves each session from its own thread
+        if not self._initialized:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, response TEXT NOT NULL,"
+                " created_at REAL NOT NULL, last_used_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used_at)")
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    def get(self, key):
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute(
+                    "SELECT response FROM responses WHERE key = ? AND created_at > ?",
+                    (key, now - self.ttl_s),
+                ).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE responses SET last_used_at = ? WHERE key = ?", (now, key))
+        finally:
+            conn.close()
+        if not row or not row[0]:
+            # Empty answers were never meant to be stored; treat any old one as a miss
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def put(self, key, response):
+        if not response:
+            return
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, created_at, last_used_at)"
+                    " VALUES (?, ?, ?, ?)",
+                    (key, response, now, now),
+                )
+                conn.execute("DELETE FROM responses WHERE created_at <= ?", (now - self.ttl_s,))
+                conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    " SELECT key FROM responses ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+        finally:
+            conn.close()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+
+answer_cache = ResponseCache()
+telemetry.register_stats("response", answer_cache.stats)
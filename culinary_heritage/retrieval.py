@@ -0,0 +1,225 @@
+"""Keyword retrieval over cookbook text.
+
+Instead of pasting the first 200k characters of every cookbook into each
+prompt, the text is split into recipe-sized chunks and indexed with BM25.
+Each turn then only sends the handful of passages relevant to the question.
+Everything here runs offline; indexes are saved next to the PDF text cache.
+
+An index does not hold the chunk texts. It keeps byte offsets into the UTF-8
+source it was built from (for bundled cookbooks, the memory-mapped cache file)
+and decodes only the passages a search returns.
+"""
+import array
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+
+from .pdf_cache import CACHE_DIR
+
+INDEX_VERSION = 2
+
+# Chunk sizes are in characters; ~1500 chars is roughly one recipe in the cookbooks
+CHUNK_TARGET = 1500
+CHUNK_MIN = 400
+CHUNK_MAX = 2500
+TOP_K = 8
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by can do for from have i if in is it me my of on or "
+    "so that the this to was what with you your".split()
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS and len(t) > 1]
+
+
+def looks_like_title(line):
+    line = line.strip()
+    if not line or len(line) > 60:
+        return False
+    letters = [c for c in line if c.isalpha()]
+    return len(letters) >= 3 and sum(c.isupper() for c in letters) / len(letters) > 0.8
+
+
+def chunk_spans(text):
+    """Split extracted PDF text into recipe-sized chunks.
+
+    A new chunk is started at a heading-like line (recipe names are usually
+    printed in capitals) once the current chunk is big enough, or whenever the
+    chunk would grow past CHUNK_MAX. Returns (start, end) UTF-8 byte offsets
+    of each chunk in `text`, with surrounding whitespace left out.
+    """
+    spans = []
+    start = offset = 0
+    current = []
+    size = 0
+
+    def close():
+        chunk = "".join(current)
+        stripped = chunk.lstrip()
+        if stripped.strip():
+            chunk_start = start + len(chunk[:len(chunk) - len(stripped)].encode("utf-8"))
+            spans.append((chunk_start, chunk_start + len(stripped.rstrip().encode("utf-8"))))
+
+    for line in text.splitlines(keepends=True):
+        content = line.rstrip("\r\n")
+        if size >= CHUNK_TARGET or (size >= CHUNK_MIN and looks_like_title(content)) \
+                or size + len(content) > CHUNK_MAX:
+            if current:
+                close()
+            current, size, start = [], 0, offset
+        current.append(line)
+        size += len(content) + 1
+        offset += len(line.encode("utf-8"))
+    if current:
+        close()
+    return spans
+
+
+class BM25Index:
+    """A small inverted index scored with Okapi BM25.
+
+    `source` is the UTF-8 text (bytes or a memory map) and `spans` the flat
+    start/end byte offsets of its chunks. Postings are flat arrays of
+    (chunk_id, term_frequency) pairs rather than lists of lists, which keeps
+    a loaded index a fraction of the size of its JSON.
+    """
+
+    k1 = 1.5
+    b = 0.75
+
+    def __init__(self, source, spans, postings, doc_lengths):
+        self.source = source
+        self.spans = array.array("Q", spans)
+        self.postings = {term: array.array("I", pairs) for term, pairs in postings.items()}
+        self.doc_lengths = array.array("I", doc_lengths)
+        self.avg_length = sum(doc_lengths) / len(doc_lengths) if doc_lengths else 0.0
+        self.digest = None
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def chunk(self, chunk_id):
+        start, end = self.spans[2 * chunk_id], self.spans[2 * chunk_id + 1]
+        return str(self.source[start:end], "utf-8")
+
+    @classmethod
+    def build(cls, source):
+        text = str(source, "utf-8")
+        spans = []
+        postings = {}
+        doc_lengths = []
+        for chunk_id, (start, end) in enumerate(chunk_spans(text)):
+            terms = tokenize(str(source[start:end], "utf-8"))
+            spans.extend((start, end))
+            doc_lengths.append(len(terms))
+            for term, tf in Counter(terms).items():
+                postings.setdefault(term, []).extend((chunk_id, tf))
+        return cls(source, spans, postings, doc_lengths)
+
+    def search(self, query, k=TOP_K):
+        """Return up to `k` (score, chunk) pairs, best first."""
+        n_docs = len(self)
+        if not n_docs:
+            return []
+        scores = Counter()
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            df = len(postings) // 2
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for chunk_id, tf in zip(postings[::2], postings[1::2]):
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[chunk_id] / self.avg_length)
+                scores[chunk_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return [(score, self.chunk(chunk_id)) for chunk_id, score in scores.most_common(k)]
+
+    def save(self, path):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": INDEX_VERSION,
+                "spans": self.spans.tolist(),
+                "postings": {term: pairs.tolist() for term, pairs in self.postings.items()},
+                "doc_lengths": self.doc_lengths.tolist(),
+            }, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, source):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != INDEX_VERSION:
+            return None
+        return cls(source, data["spans"], data["postings"], data["doc_lengths"])
+
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+_MAX_INDEXES = 16
+
+
+def get_index(source, cache_dir=CACHE_DIR):
+    """Return the BM25 index for `source`, loading or building it as needed.
+
+    `source` is text, or its UTF-8 encoding as bytes or a buffer (e.g.
+    `pdf_text_cache.buffer`), which the index then reads passages from in
+    place. Indexes are keyed by a hash of the text, kept in memory for the
+    process and saved to `cache_dir`, so a cookbook is only indexed once.
+    """
+    if isinstance(source, str):
+        source = source.encode("utf-8")
+    key = hashlib.sha256(source).hexdigest()
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            return index
+
+        index_path = os.path.join(cache_dir, f"{key}.bm25.v{INDEX_VERSION}.json")
+        index = None
+        if os.path.exists(index_path):
+            try:
+                index = BM25Index.load(index_path, source)
+            except (OSError, ValueError):
+                index = None
+        if index is None:
+            index = BM25Index.build(source)
+            os.makedirs(cache_dir, exist_ok=True)
+            index.save(index_path)
+
+        # Content hash of the indexed text, used to fingerprint the corpus
+        index.digest = key
+        _indexes[key] = index
+        if len(_indexes) > _MAX_INDEXES:
+            _indexes.popitem(last=False)
+        return index
+
+
+def retrieve(indexes, query, k=TOP_K):
+    """Search several indexes and return the `k` best passages overall."""
+    results = []
+    for index in indexes:
+        results.extend(index.search(query, k))
+    results.sort(key=lambda r: r[0], reverse=True)
+    return [chunk for _, chunk in results[:k]]
+
+
+def build_query(chat_history, turns=3):
+    """Combine the user's last few messages into one search query.
+
+    Follow-up answers like "yes, spicy please" carry few keywords on their own.
+    """
+    recent = [m["content"] for m in chat_history if m["role"] == "user"]
+    return " ".join(recent[-turns:])
+
+
+def format_passages(passages):
+    return "\n\n---\n\n".join(passages)
@@ -0,0 +1,183 @@
+"""Optional semantic retrieval: cookbook chunks embedded with a small local model.
+
+Mood-style questions ("I feel homesick and it's raining") share few words
+with recipe text, so BM25 alone misses them. With CULINARY_RETRIEVAL set to
+"semantic" (embeddings only) or "hybrid" (embeddings and BM25, merged by
+reciprocal rank fusion), each BM25 index's chunks are also embedded with
+CULINARY_EMBEDDING_MODEL on the CPU, in batches, when the cookbook is
+ingested. The vectors are saved next to the BM25 index as a NumPy matrix
+(`{digest}.{model}.vec.npy`, memory-mapped when loaded) and, for big
+cookbooks when FAISS is installed, an HNSW graph (`.hnsw.faiss`).
+
+Needs numpy and sentence-transformers (faiss-cpu is optional); without them,
+or with the default CULINARY_RETRIEVAL=keyword, retrieval stays BM25 only.
+"""
+import functools
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from . import retrieval
+from .pdf_cache import CACHE_DIR
+
+RETRIEVAL_MODE = os.environ.get("CULINARY_RETRIEVAL", "keyword").lower()
+EMBEDDING_MODEL = os.environ.get("CULINARY_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+BATCH_SIZE = 64
+# Below this many chunks an exact matrix product beats building a graph
+HNSW_MIN_CHUNKS = 5000
+RRF_K = 60
+
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=1)
+def available():
+    try:
+        import numpy  # noqa: F401
+        import sentence_transformers  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+@functools.lru_cache(maxsize=1)
+def enabled():
+    if RETRIEVAL_MODE not in ("semantic", "hybrid"):
+        return False
+    if not available():
+        logger.warning("CULINARY_RETRIEVAL=%s needs numpy and sentence-transformers; using keyword search",
+                       RETRIEVAL_MODE)
+        return False
+    return True
+
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def _get_model():
+    global _model
+    with _model_lock:
+        if _model is None:
+            from sentence_transformers import SentenceTransformer
+
+            _model = SentenceTransformer(EMBEDDING_MODEL, device="cpu")
+        return _model
+
+
+def embed(texts):
+    """Unit-length float32 embeddings of `texts`, one row each."""
+    return _get_model().encode(
+        list(texts), batch_size=BATCH_SIZE, normalize_embeddings=True, convert_to_numpy=True
+    ).astype("float32")
+
+
+class VectorIndex:
+    """Embeddings of one BM25 index's chunks, searched by cosine similarity."""
+
+    def __init__(self, index, vectors, hnsw=None):
+        self.index = index
+        self.vectors = vectors
+        self.hnsw = hnsw
+
+    def search(self, query_vector, k=retrieval.TOP_K):
+        """Return up to `k` (score, chunk) pairs, best first."""
+        import numpy as np
+
+        if not len(self.vectors):
+            return []
+        k = min(k, len(self.vectors))
+        if self.hnsw is not None:
+            scores, ids = self.hnsw.search(query_vector[None, :], k)
+            return [(float(score), self.index.chunk(int(i))) for score, i in zip(scores[0], ids[0]) if i >= 0]
+        scores = self.vectors @ query_vector
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[i]), self.index.chunk(int(i))) for i in top]
+
+
+_vector_indexes = OrderedDict()
+_vector_indexes_lock = threading.Lock()
+_MAX_VECTOR_INDEXES = 16
+
+
+def get_vectors(index, cache_dir=CACHE_DIR):
+    """Return the VectorIndex for a BM25 `index`, loading or embedding its chunks as needed."""
+    import numpy as np
+
+    model_slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", EMBEDDING_MODEL)
+    key = (index.digest, model_slug)
+    with _vector_indexes_lock:
+        vector_index = _vector_indexes.get(key)
+        if vector_index is not None:
+            _vector_indexes.move_to_end(key)
+            return vector_index
+
+        path = os.path.join(cache_dir, f"{index.digest}.{model_slug}.vec.npy")
+        vectors = None
+        if os.path.exists(path):
+            try:
+                vectors = np.load(path, mmap_mode="r")
+            except (OSError, ValueError):
+                vectors = None
+            if vectors is not None and len(vectors) != len(index):
+                vectors = None
+        if vectors is None:
+            vectors = embed(index.chunk(i) for i in range(len(index)))
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp.npy"
+            np.save(tmp_path, vectors)
+            os.replace(tmp_path, path)
+
+        vector_index = _vector_indexes[key] = VectorIndex(index, vectors, _load_hnsw(path, vectors))
+        if len(_vector_indexes) > _MAX_VECTOR_INDEXES:
+            _vector_indexes.popitem(last=False)
+        return vector_index
+
+
+def _load_hnsw(vectors_path, vectors):
+    """The HNSW graph for `vectors`, loaded or built and saved, or None if not worth it."""
+    if len(vectors) < HNSW_MIN_CHUNKS:
+        return None
+    try:
+        import faiss
+        import numpy as np
+    except ImportError:
+        return None
+    path = vectors_path.replace(".vec.npy", ".hnsw.faiss")
+    if os.path.exists(path):
+        hnsw = faiss.read_index(path)
+        if hnsw.ntotal == len(vectors):
+            return hnsw
+    hnsw = faiss.IndexHNSWFlat(vectors.shape[1], 32, faiss.METRIC_INNER_PRODUCT)
+    hnsw.add(np.ascontiguousarray(vectors))
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    faiss.write_index(hnsw, tmp_path)
+    os.replace(tmp_path, path)
+    return hnsw
+
+
+def retrieve(indexes, query, k=retrieval.TOP_K, mode=None):
+    """Like `retrieval.retrieve`, using embeddings per CULINARY_RETRIEVAL (or `mode`)."""
+    mode = mode or RETRIEVAL_MODE
+    query_vector = embed([query])[0]
+    semantic = []
+    for index in indexes:
+        semantic.extend(get_vectors(index).search(query_vector, k))
+    semantic.sort(key=lambda r: r[0], reverse=True)
+    semantic = [chunk for _, chunk in semantic[:k]]
+    if mode != "hybrid":
+        return semantic
+    return fuse([semantic, retrieval.retrieve(indexes, query, k)], k)
+
+
+def fuse(rankings, k=retrieval.TOP_K):
+    """Merge several best-first lists into the `k` best items by reciprocal rank fusion."""
+    # Scores from different rankings aren't comparable, ranks are
+    fused = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking):
+            fused[item] = fused.get(item, 0.0) + 1.0 / (RRF_K + rank + 1)
+    return sorted(fused, key=fused.get, reverse=True)[:k]
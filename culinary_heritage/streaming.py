@@ -0,0 +1,125 @@
+"""Streamed Gemini answers with per-turn latency measurements."""
+import time
+
+from . import model_pool, telemetry
+
+
+class TimedStream:
+    """Iterate over the text chunks of a Gemini answer while timing it.
+
+    Call `start()` to send the request and wait for the first chunk (the app
+    does this under its "Thinking..." spinner), then iterate to get the rest,
+    e.g. with `st.write_stream`. After iteration, `text` holds the whole answer
+    and `metrics()` the time to first token and total latency in seconds.
+    With `stream=False` the answer arrives as a single chunk. An answer with
+    no text at all (e.g. safety-blocked) raises model_pool.EmptyAnswerError
+    at the end, so callers treat it as a failed turn.
+    """
+
+    def __init__(self, model, prompt, stream=True):
+        self.model = model
+        self.prompt = prompt
+        self.stream = stream
+        self.started_at = None
+        self.first_token_s = None
+        self.total_s = None
+        self._chunks = None
+        self._first = None
+        self._parts = []
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        if self.stream:
+            self._chunks = self._texts(model_pool.generate_content(self.model, self.prompt, stream=True))
+        else:
+            self._chunks = iter([model_pool.generate_content(self.model, self.prompt).text])
+        self._first = next(self._chunks, None)
+        self.first_token_s = time.perf_counter() - self.started_at
+        return self
+
+    @staticmethod
+    def _texts(response):
+        for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunks without text parts (e.g. the final finish-reason chunk)
+                continue
+            if text:
+                yield text
+
+    def __iter__(self):
+        if self._chunks is None:
+            self.start()
+        if self._first is not None:
+            self._parts.append(self._first)
+            yield self._first
+        for text in self._chunks:
+            self._parts.append(text)
+            yield text
+        self._finish()
+
+    def _finish(self):
+        self.total_s = time.perf_counter() - self.started_at
+        if not self.text:
+            raise model_pool.EmptyAnswerError("The model returned no text.")
+        telemetry.observe("culinary_stage_duration_seconds", self.first_token_s,
+                          telemetry.DURATION_BUCKETS, stage="model_first_token")
+        telemetry.observe("culinary_stage_duration_seconds", self.total_s,
+                          telemetry.DURATION_BUCKETS, stage="model_answer")
+        telemetry.observe("culinary_response_chars", len(self.text))
+        telemetry.log_event("model_answer", **self.metrics())
+
+    @property
+    def text(self):
+        return "".join(self._parts)
+
+    def metrics(self):
+        return {
+            "time_to_first_token_s": round(self.first_token_s, 3),
+            "total_s": round(self.total_s, 3) if self.total_s is not None else None,
+            "response_chars": len(self.text),
+            "streamed": self.stream,
+        }
+
+
+class AsyncTimedStream(TimedStream):
+    """TimedStream for asyncio callers: `await start()`, then `async for`."""
+
+    async def start(self):
+        self.started_at = time.perf_counter()
+        if self.stream:
+            response = await model_pool.generate_content_async(self.model, self.prompt, stream=True)
+            self._chunks = self._texts_async(response)
+        else:
+            response = await model_pool.generate_content_async(self.model, self.prompt)
+            self._chunks = self._texts_async([response])
+        self._first = await anext(self._chunks, None)
+        self.first_token_s = time.perf_counter() - self.started_at
+        return self
+
+    @staticmethod
+    async def _texts_async(response):
+        if hasattr(response, "__aiter__"):
+            async for chunk in response:
+                for text in TimedStream._texts([chunk]):
+                    yield text
+        else:
+            for text in TimedStream._texts(response):
+                yield text
+
+    async def __aiter__(self):
+        if self._chunks is None:
+            await self.start()
+        if self._first is not None:
+            self._parts.append(self._first)
+            yield self._first
+        async for text in self._chunks:
+            self._parts.append(text)
+            yield text
+        self._finish()
+
+
+def describe(metrics):
+    return (f"First words in {metrics['time_to_first_token_s']:.1f}s · "
+            f"full answer in {metrics['total_s']:.1f}s")
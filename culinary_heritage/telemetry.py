@@ -0,0 +1,226 @@
+"""Lightweight per-stage tracing and metrics.
+
+Wrap a stage in `span`:
+
+    with telemetry.span("prompt_build") as fields:
+        prompt = ...
+        fields["prompt_chars"] = len(prompt)
+
+Each span records its duration in a per-stage histogram, counts failures by
+exception type (and re-raises them), and writes one JSON log line with the
+duration, the extra `fields` and the current turn's trace id. Sizes go through
+`observe`, and the caches register their hit/miss counters with
+`register_stats`. Everything is process-wide and can be read as Prometheus
+text (`prometheus_text`, also served on CULINARY_METRICS_PORT if set, bound to
+CULINARY_METRICS_HOST, 127.0.0.1 by default) or as a dict for the sidebar
+debug panel (`snapshot`).
+
+JSON logs go to the "culinary_heritage.telemetry" logger; set
+CULINARY_TRACE_LOG to a file path, or "-" for stderr, to write them out.
+"""
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000)
+# Recent samples kept per series for the debug panel's percentiles
+RECENT_SAMPLES = 512
+METRICS_PORT = int(os.environ.get("CULINARY_METRICS_PORT", 0))
+# Loopback unless a scraper on another host needs it; set 0.0.0.0 to expose it
+METRICS_HOST = os.environ.get("CULINARY_METRICS_HOST", "127.0.0.1")
+TRACE_LOG = os.environ.get("CULINARY_TRACE_LOG", "")
+
+logger = logging.getLogger("culinary_heritage.telemetry")
+if TRACE_LOG:
+    logger.setLevel(logging.INFO)
+    logger.addHandler(logging.StreamHandler(sys.stderr) if TRACE_LOG == "-" else logging.FileHandler(TRACE_LOG))
+    logger.propagate = False
+
+_trace_id = contextvars.ContextVar("trace_id", default=None)
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def add(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+
+
+_lock = threading.Lock()
+_histograms = {}   # (name, sorted label items) -> _Histogram
+_counters = {}     # (name, sorted label items) -> float
+_stats_sources = {}
+
+
+def _series(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def observe(name, value, buckets=SIZE_BUCKETS, **labels):
+    """Add `value` to the histogram `name` with `labels`."""
+    key = _series(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = _Histogram(buckets)
+        histogram.add(value)
+
+
+def count(name, amount=1, **labels):
+    key = _series(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def register_stats(name, stats):
+    """Export `stats()` (a dict of numbers, e.g. a cache's hits and misses) as gauges."""
+    _stats_sources[name] = stats
+
+
+def log_event(event, **fields):
+    if logger.isEnabledFor(logging.INFO):
+        record = {"ts": round(time.time(), 3), "event": event, "trace_id": _trace_id.get(), **fields}
+        logger.info(json.dumps(record, default=str))
+
+
+def new_trace():
+    """Start a new trace id (one per chat turn) for the spans that follow in this context."""
+    trace_id = uuid.uuid4().hex[:16]
+    _trace_id.set(trace_id)
+    return trace_id
+
+
+@contextlib.contextmanager
+def span(stage, **fields):
+    """Time the block as `stage`; add to the yielded dict to log extra fields."""
+    started = time.perf_counter()
+    error = None
+    try:
+        yield fields
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        duration_s = time.perf_counter() - started
+        observe("culinary_stage_duration_seconds", duration_s, DURATION_BUCKETS, stage=stage)
+        if error is not None:
+            count("culinary_stage_errors_total", stage=stage, error=error)
+        log_event("span", stage=stage, duration_ms=round(duration_s * 1000, 2), error=error, **fields)
+
+
+def percentile(values, pct):
+    """The `pct`th percentile of `values` (nearest rank); also used by the benchmarks."""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def snapshot():
+    """Stage timings, sizes, counters and cache stats as plain data."""
+    with _lock:
+        histograms = {key: (h.count, h.sum, list(h.recent)) for key, h in _histograms.items()}
+        counters = dict(_counters)
+    series = []
+    for (name, labels), (n, total, recent) in sorted(histograms.items()):
+        series.append({
+            "name": name,
+            **dict(labels),
+            "count": n,
+            "mean": total / n,
+            "p50": percentile(recent, 50),
+            "p95": percentile(recent, 95),
+        })
+    return {
+        "series": series,
+        "counters": [{"name": name, **dict(labels), "value": value}
+                     for (name, labels), value in sorted(counters.items())],
+        "caches": {name: stats() for name, stats in sorted(_stats_sources.items())},
+    }
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+
+def prometheus_text():
+    """All metrics in the Prometheus text exposition format."""
+    with _lock:
+        histograms = {key: (h.buckets, list(h.counts), h.count, h.sum) for key, h in _histograms.items()}
+        counters = dict(_counters)
+    lines = []
+    declared = set()
+    for (name, labels), (buckets, counts, n, total) in sorted(histograms.items()):
+        if name not in declared:
+            declared.add(name)
+            lines.append(f"# TYPE {name} histogram")
+        for bound, bucket_count in zip(buckets, counts):
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', bound),))} {bucket_count}")
+        lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {n}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+        lines.append(f"{name}_count{_format_labels(labels)} {n}")
+    for (name, labels), value in sorted(counters.items()):
+        if name not in declared:
+            declared.add(name)
+            lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+    for source, stats in sorted(_stats_sources.items()):
+        for stat, value in sorted(stats().items()):
+            name = f"culinary_cache_{stat}"
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name}{_format_labels((('cache', source),))} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port=METRICS_PORT, host=METRICS_HOST):
+    """Serve /metrics on `host`:`port` from a background thread, once per process (no-op if port is 0)."""
+    global _server
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+        return _server
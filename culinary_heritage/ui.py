@@ -0,0 +1,290 @@
+"""The Streamlit chat page, shared by every persona."""
+import os
+
+import streamlit as st
+
+from . import ROOT_DIR, model_pool, ocr, streaming, telemetry
+from .background import background_url
+from .chat import ChatSession
+from .conversations import conversation_store, new_conversation_id
+from .corpus import warm_status
+from .pdf_cache import content_digest
+
+# Show per-stage timings and cache hit rates in the sidebar
+DEBUG_PANEL = os.environ.get("CULINARY_DEBUG_PANEL", "") not in ("", "0")
+
+
+# BACKGROUND IMAGE
+def set_background(image_file):
+    # Resized and encoded once per process, not on every rerun (see background.py)
+    url = background_url(image_file)
+    if url:
+        st.markdown(
+            f"""
+            <style>
+            [data-testid="stAppViewContainer"] {{
+                background-image: url("{url}");
+                background-size: cover;
+                background-position: center top;
+                background-attachment: fixed;
+                background-repeat: no-repeat;
+            }}
+            [data-testid="stAppViewContainer"]::before {{
+                content: "";
+                position: fixed;
+                top: 0; left: 0;
+                width: 100%; height: 100%;
+                background: rgba(0, 0, 0, 0.55);
+                z-index: 0;
+            }}
+            [data-testid="stAppViewContainer"] > div {{
+                position: relative;
+                z-index: 1;
+            }}
+            [data-testid="stHeader"] {{
+                background: rgba(0, 0, 0, 0) !important;
+            }}
+            [data-testid="stSidebar"] {{
+                background: rgba(15, 8, 3, 0.88) !important;
+            }}
+            </style>
+            """,
+            unsafe_allow_html=True,
+        )
+
+
+def _attach_corpus(session, persona):
+    """Hand the session the shared bundled corpus once it has warmed up, without waiting for it."""
+    if session.corpus is not None or not persona.bundled_pdfs:
+        return
+    # Loaded once per process on a background thread (see corpus.py)
+    status = warm_status(persona.bundled_pdfs)
+    if not status.ready:
+        _warming_notice(status)
+    elif status.error is not None:
+        # Recorded by the corpus_load span; chat still works with uploads only
+        st.warning(f"Couldn't open the bundled cookbooks ({type(status.error).__name__}).")
+    else:
+        session.corpus = status.corpus
+
+
+@st.fragment(run_every=1)
+def _warming_notice(status):
+    if status.ready:
+        # Rerun the whole page so the session picks the corpus up
+        st.rerun()
+    if status.total:
+        st.progress(status.done / status.total,
+                    text=f"Still opening the family cookbooks... page {status.done} of {status.total}. "
+                         "You can start chatting meanwhile.")
+    else:
+        st.info("Still opening the family cookbooks... You can start chatting meanwhile.")
+
+
+def _debug_panel(container, session):
+    snapshot = telemetry.snapshot()
+    with container.expander("Debug: timings and caches"):
+        stages = [series for series in snapshot["series"] if series["name"] == "culinary_stage_duration_seconds"]
+        st.dataframe(
+            [{"stage": series["stage"], "count": series["count"],
+              "p50 ms": round(series["p50"] * 1000, 1), "p95 ms": round(series["p95"] * 1000, 1)}
+             for series in stages],
+            hide_index=True,
+        )
+        for name, stats in snapshot["caches"].items():
+            st.caption(f"{name} cache: {stats['hit_rate']:.0%} hits "
+                       f"({sum(v for k, v in stats.items() if k.endswith('hits'))} of "
+                       f"{sum(v for k, v in stats.items() if k.endswith(('hits', 'misses')))})")
+        for counter in snapshot["counters"]:
+            labels = ", ".join(f"{k}={v}" for k, v in counter.items() if k not in ("name", "value"))
+            st.caption(f"{counter['name']} ({labels}): {counter['value']:g}")
+        if session.turn_metrics:
+            st.json(session.turn_metrics[-1], expanded=False)
+        st.code(telemetry.prometheus_text(), language=None)
+
+
+def _open_session(persona):
+    """Resume the conversation named in the URL, so a reload or a restart doesn't lose it."""
+    user_id = st.user.get("email") if st.user.get("is_logged_in") else None
+    conversation_id = st.query_params.get("conversation")
+    if conversation_id:
+        saved = conversation_store.resume(conversation_id)
+        if saved is not None and saved.persona == persona.slug and saved.user_id in ("", user_id or ""):
+            return ChatSession.from_saved(persona, saved)
+    return ChatSession(persona, conversation_id=new_conversation_id(), user_id=user_id)
+
+
+def _upload_digest(uploaded_file):
+    # Hash each upload once per browser session, not on every rerun
+    digests = st.session_state.setdefault("upload_digests", {})
+    if uploaded_file.file_id not in digests:
+        digests[uploaded_file.file_id] = content_digest(uploaded_file.getvalue())
+    return digests[uploaded_file.file_id]
+
+
+def render(persona):
+    """Draw the chat page for `persona`."""
+    telemetry.start_metrics_server()
+
+    # 1. PAGE SETUP
+    st.set_page_config(page_title=persona.page_title, page_icon=persona.page_icon)
+    if persona.background:
+        set_background(os.path.join(ROOT_DIR, persona.background))
+    st.title(persona.title)
+
+    # 2. SIDEBAR - SETUP
+    with st.sidebar:
+        st.header("1. Kitchen Setup")
+        api_key = st.text_input("Google API Key", type="password", key="api_key")
+
+        if persona.about:
+            st.header(f"2. {persona.about_header}")
+            st.write(persona.about)
+
+        st.markdown("---")
+        st.header("3. Upload Cookbooks")
+        uploaded_files = st.file_uploader(
+            persona.uploader_label,
+            type=["pdf"],
+            accept_multiple_files=True,
+            key=f"uploads:{persona.slug}",
+        )
+
+        stream_answers = st.toggle("Stream answers as they are written", value=True)
+        bypass_cache = st.toggle("Always ask afresh (skip remembered answers)", value=False)
+        suggest_dishes = st.toggle("Suggest dishes from the cookbooks instantly", value=True)
+
+        # Button to Clear Conversation
+        start_over = st.button("Start New Conversation")
+        # Filled in at the end of the run, so it includes this turn
+        debug_container = st.container() if DEBUG_PANEL else None
+
+    # 3. INITIALIZE CHAT MEMORY (SESSION STATE)
+    # One conversation per persona, so switching pages doesn't mix them up
+    session_key = f"chat:{persona.slug}"
+    if session_key not in st.session_state:
+        st.session_state[session_key] = _open_session(persona)
+    session = st.session_state[session_key]
+    _attach_corpus(session, persona)
+    if start_over:
+        # The old conversation stays saved; the new one gets its own id
+        session.reset()
+        st.query_params["conversation"] = session.conversation_id
+        st.rerun()
+    if st.query_params.get("conversation") != session.conversation_id:
+        st.query_params["conversation"] = session.conversation_id
+
+    # 4. PROCESS EACH PDF ONLY ONCE
+    # Files are tracked by content hash: added ones are read, removed ones dropped.
+    # Only new files' bytes are fetched; the session already holds the rest
+    documents = [(_upload_digest(uploaded_file), uploaded_file) for uploaded_file in uploaded_files or ()]
+    documents = [(digest, uploaded_file.name, None if digest in session.uploads else uploaded_file.getvalue())
+                 for digest, uploaded_file in documents]
+    if {digest for digest, _, _ in documents} != set(session.uploads):
+        added = any(digest not in session.uploads for digest, _, _ in documents)
+        with st.spinner("Crunching the cookbooks..."):
+            upload_progress = st.empty()
+            results = session.sync_uploads(
+                documents,
+                on_progress=lambda done, total: upload_progress.progress(
+                    done / total, text=f"Reading page {done} of {total}"
+                ),
+            )
+            upload_progress.empty()
+        for result in results:
+            if result.error is not None:
+                st.error(f"Error reading {result.name}: {result.error}")
+            if result.ocr_pages:
+                st.info(f"Read {result.ocr_pages} handwritten or scanned pages of {result.name}.")
+            if result.unread_pages:
+                st.warning(
+                    f"{result.unread_pages} pages of {result.name} look scanned and couldn't be read"
+                    + ("." if ocr.available() else " (OCR needs pytesseract, Pillow and Tesseract installed).")
+                )
+        if added:
+            st.success("✅ Cookbooks Memorized! You can now chat.")
+
+    # 5. DISPLAY CHAT HISTORY
+    # A resumed conversation shows its recent messages; older ones on request
+    if session.earlier_count:
+        st.button(f"Show earlier messages ({session.earlier_count} more)", on_click=session.load_earlier)
+    # This loop draws the previous messages every time the app reloads
+    for message in [*session.earlier_messages, *session.chat_history]:
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+            if session.chat_history and message is session.chat_history[-1]:
+                _dish_buttons(session)
+
+    # 6. CHAT INPUT (The actual text box at the bottom)
+    # A dish picked from a shortlist counts as the next message
+    picked = st.session_state.pop(f"picked:{persona.slug}", None)
+    if user_input := st.chat_input(persona.chat_placeholder) or (picked and f"Tell me how to make {picked}"):
+        _chat_turn(session, api_key, user_input, stream_answers, bypass_cache, suggest_dishes)
+
+    if debug_container is not None:
+        _debug_panel(debug_container, session)
+
+
+def _dish_buttons(session):
+    """Buttons for the dishes of a shortlist, if the latest reply was one."""
+    if not session.turn_metrics or session.chat_history[-1]["role"] != "assistant":
+        return
+    titles = session.turn_metrics[-1].get("shortlist")
+    if not titles:
+        return
+    for column, title in zip(st.columns(len(titles)), titles):
+        column.button(
+            title,
+            key=f"dish:{len(session.chat_history)}:{title}",
+            on_click=st.session_state.__setitem__,
+            args=(f"picked:{session.persona.slug}", title),
+        )
+
+
+def _chat_turn(session, api_key, user_input, stream_answers, bypass_cache, suggest_dishes):
+    # A. Check for API Key
+    if not api_key:
+        st.error("Please enter your API Key in the sidebar first!")
+        st.stop()
+
+    # B. Display User Message
+    with st.chat_message("user"):
+        st.markdown(user_input)
+
+    # C. Generate AI Response
+    telemetry.new_trace()
+    with telemetry.span("turn", persona=session.persona.slug) as fields:
+        with st.chat_message("assistant"):
+            try:
+                with st.spinner("Thinking..."):
+                    # Catalog shortlist, remembered answer or the model (see ChatSession.begin_turn)
+                    turn = session.begin_turn(
+                        user_input, api_key, stream_answers, bypass_cache, suggest_dishes
+                    )
+                fields["cache_hit"] = turn.kind == "cached"
+                if turn.kind == "shortlist":
+                    st.markdown(turn.text)
+                    fields["shortlist"] = True
+                    _dish_buttons(session)
+                    return
+                if turn.kind == "cached":
+                    st.markdown(turn.text)
+                    st.caption(f"Remembered answer · {turn.metrics['total_s'] * 1000:.0f} ms")
+                    return
+
+                # Render the answer chunk by chunk as it arrives
+                st.write_stream(turn.answer)
+                # Save AI answer to memory
+                metrics = turn.finish()
+                st.caption(
+                    f"{streaming.describe(metrics)} · prompt ≈ {metrics['prompt_tokens']['total']} tokens "
+                    f"(persona {metrics['prompt_tokens']['persona']}, cookbooks {metrics['prompt_tokens']['corpus']}, "
+                    f"history {metrics['prompt_tokens']['history']})"
+                )
+                fields["response_chars"] = len(turn.text)
+
+            except Exception as e:
+                # Shown to the user, and counted and logged rather than lost
+                fields["failed_with"] = type(e).__name__
+                telemetry.count("culinary_turn_errors_total", error=type(e).__name__)
+                st.error(model_pool.describe_error(e))
@@ -0,0 +1,23 @@
+"""Start the app with the bundled cookbooks already loading.
+
+    python serve.py [streamlit run options...]
+
+Same as `streamlit run app.py`, except that the bundled cookbooks of every
+persona start loading and indexing on a background thread before the server
+accepts its first session, instead of on the first visit.
+"""
+import os
+import sys
+
+from streamlit.web import cli as stcli
+
+from culinary_heritage.corpus import start_warming
+from culinary_heritage.personas import load_personas
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+if __name__ == "__main__":
+    start_warming(persona.bundled_pdfs for persona in load_personas().values() if persona.bundled_pdfs)
+    # Streamlit runs app.py in this process, so it shares the warming corpus
+    sys.argv = ["streamlit", "run", APP_PATH, *sys.argv[1:]]
+    sys.exit(stcli.main())